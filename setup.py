@@ -326,6 +326,9 @@ setup(name = 'Photini',
       cmdclass = cmdclass,
       command_options = command_options,
       entry_points = {
+          'console_scripts' : [
+              'photini-batch = photini.batch:main',
+              ],
           'gui_scripts' : [
               'photini = photini.editor:main',
               ],
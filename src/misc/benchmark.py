@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2019  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+# Compare the speed of alternative implementations of some of Photini's
+# slower operations, using a corpus of real image files. Usage:
+#   python src/misc/benchmark.py metadata ~/Pictures/2019
+#   python src/misc/benchmark.py thumbnail ~/Pictures/large/*.jpg
+#   python src/misc/benchmark.py collection -n 5000
+#   python src/misc/benchmark.py exif ~/Pictures/2019
+
+from __future__ import print_function, unicode_literals
+
+import argparse
+import os
+import sys
+import time
+
+
+def find_files(paths):
+    result = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                for name in sorted(files):
+                    if os.path.splitext(name)[1].lower() != '.xmp':
+                        result.append(os.path.join(root, name))
+        else:
+            result.append(path)
+    return result
+
+
+def report(name, duration, count):
+    print('{:>24s}: {:8.3f} s, {:8.3f} ms per file'.format(
+        name, duration, duration * 1000.0 / max(count, 1)))
+
+
+def time_it(func, files, repeat):
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        result = func(files)
+        duration = time.time() - start
+        if best is None or duration < best:
+            best = duration
+    return best, result
+
+
+def bench_metadata(args):
+    from photini.metadata import Metadata
+
+    files = find_files(args.paths)
+
+    def per_field(files):
+        result = []
+        for path in files:
+            md = Metadata(path)
+            result.append(dict(
+                (name, getattr(md, name)) for name in Metadata._tag_list))
+        return result
+
+    def snapshot(files):
+        result = []
+        for path in files:
+            values = Metadata.read_values(path, Metadata.open_handlers(path))
+            del values['mime_type']
+            result.append(values)
+        return result
+
+    duration, expected = time_it(per_field, files, args.repeat)
+    report('per field', duration, len(files))
+    duration, result = time_it(snapshot, files, args.repeat)
+    report('snapshot', duration, len(files))
+    for path, a, b in zip(files, expected, result):
+        if a != b:
+            print('mismatch:', path)
+
+
+def bench_thumbnail(args):
+    from six import BytesIO
+    import PIL.Image as PIL
+    from photini.pyqt import Qt, QtCore, QtGui
+    from photini.imagelist import make_thumbnail
+
+    app = QtCore.QCoreApplication([])
+    files = find_files(args.paths)
+
+    def full_decode(files):
+        # previous method: decode whole image with Qt, convert to PIL
+        # via PPM, then resize
+        result = []
+        for path in files:
+            qt_im = QtGui.QImage(path)
+            if max(qt_im.width(), qt_im.height()) >= 6000:
+                qt_im = qt_im.scaled(
+                    6000, 6000, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+            buf = QtCore.QBuffer()
+            buf.open(QtCore.QIODevice.WriteOnly)
+            qt_im.save(buf, 'PPM')
+            pil_im = PIL.open(BytesIO(buf.data().data()))
+            pil_im = pil_im.resize((160, 120), PIL.LANCZOS)
+            data = BytesIO()
+            pil_im.save(data, 'JPEG')
+            result.append(data.getvalue())
+        return result
+
+    def reduced_decode(files):
+        return [make_thumbnail(path, 'image/jpeg', None) for path in files]
+
+    duration, result = time_it(full_decode, files, args.repeat)
+    report('full decode', duration, len(files))
+    duration, result = time_it(reduced_decode, files, args.repeat)
+    report('reduced decode', duration, len(files))
+    for path, thumb in zip(files, result):
+        if not thumb:
+            print('failed:', path)
+
+
+def bench_collection(args):
+    from photini.imagelist import ImageCollection
+
+    class Image(object):
+        def __init__(self, path):
+            self.path = path
+
+    # paths in random order, as returned by worker threads
+    paths = ['/photos/{:03d}/IMG_{:06d}.JPG'.format(i % 500, i)
+             for i in range(args.count)]
+    paths = paths[1::2] + paths[::2]
+
+    # each method opens every file (skipping duplicates), sorts the
+    # images, finds the position of each image, then closes them all
+
+    def plain_list(paths):
+        # previous method: linear search for duplicates, list.remove
+        images = []
+        for path in paths:
+            for image in images:
+                if image.path == path:
+                    break
+            else:
+                images.append(Image(path))
+        images.sort(key=lambda x: x.path)
+        for image in images:
+            idx = images.index(image)
+        for image in list(images):
+            images.remove(image)
+        return images
+
+    def collection(paths):
+        images = ImageCollection()
+        for path in paths:
+            if not images.get(path):
+                images.add(Image(path))
+        images.sort()
+        for image in images:
+            idx = images.index(image)
+        images.remove(list(images))
+        return images
+
+    duration, result = time_it(plain_list, paths, args.repeat)
+    report('list', duration, len(paths))
+    duration, result = time_it(collection, paths, args.repeat)
+    report('ImageCollection', duration, len(paths))
+
+
+def bench_exif(args):
+    from photini.imageheader import probe_exif
+    from photini.metadata import Metadata
+
+    files = find_files(args.paths)
+    names = ('camera_model', 'date_taken', 'date_digitised', 'date_modified')
+
+    def metadata(files):
+        # previous method: read every field with exiv2
+        result = []
+        for path in files:
+            values = Metadata.read_values(path, Metadata.open_handlers(path))
+            for name in names[1:]:
+                if values[name]:
+                    values[name] = values[name].datetime
+            result.append(dict((x, values[x]) for x in names))
+        return result
+
+    def probe(files):
+        return [probe_exif(path) for path in files]
+
+    duration, expected = time_it(metadata, files, args.repeat)
+    report('exiv2', duration, len(files))
+    duration, result = time_it(probe, files, args.repeat)
+    report('Exif probe', duration, len(files))
+    for path, a, b in zip(files, expected, result):
+        if not b:
+            print('not probed:', path)
+        elif a != b:
+            print('mismatch:', path, [x for x in names if a[x] != b[x]])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Photini benchmarks')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='number of runs (fastest is reported)')
+    sub_parsers = parser.add_subparsers(dest='test')
+    sub_parser = sub_parsers.add_parser(
+        'metadata', help='reading all fields of Metadata')
+    sub_parser.add_argument('paths', nargs='+', help='files or directories')
+    sub_parser.set_defaults(func=bench_metadata)
+    sub_parser = sub_parsers.add_parser(
+        'thumbnail', help='regenerating thumbnails')
+    sub_parser.add_argument('paths', nargs='+', help='files or directories')
+    sub_parser.set_defaults(func=bench_thumbnail)
+    sub_parser = sub_parsers.add_parser(
+        'collection', help='opening and closing many (imaginary) files')
+    sub_parser.add_argument('-n', '--count', type=int, default=5000,
+                            help='number of files')
+    sub_parser.set_defaults(func=bench_collection)
+    sub_parser = sub_parsers.add_parser(
+        'exif', help='reading camera model and dates for the importer')
+    sub_parser.add_argument('paths', nargs='+', help='files or directories')
+    sub_parser.set_defaults(func=bench_exif)
+    args = parser.parse_args(argv)
+    if not args.test:
+        parser.print_help()
+        return 1
+    args.func(args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2019  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+"""Apply metadata edits to many files without using the Photini GUI.
+
+The edits are read from a "manifest" file in JSON lines or CSV format.
+Each line (or row) has the path of an image file and new values for
+some Photini metadata fields, for example::
+
+    {"path": "IMG_1234.jpg", "keywords": ["sea", "sky"], "latlong": [51.5, -0.12]}
+
+or::
+
+    path,keywords,date_taken
+    IMG_1234.jpg,sea;sky,2019-05-01T12:34:56
+
+Relative paths are relative to the manifest file's directory. A null
+(JSON) or empty (CSV) value clears the field. Dates are in ISO 8601
+format and multiple values in CSV are separated by semicolons.
+
+"""
+
+from __future__ import print_function, unicode_literals
+
+import csv
+import io
+import json
+import logging
+import multiprocessing
+from optparse import OptionParser
+import os
+import sys
+
+import six
+
+from photini import __version__
+from photini.configstore import BaseConfigStore
+from photini.metadata import DateTime, Metadata
+
+logger = logging.getLogger(__name__)
+
+
+def read_manifest(path, fmt=None):
+    """Generate (file path, edits) pairs from a manifest file.
+
+    fmt is 'jsonl' or 'csv'. If it's None the file name extension is
+    used to choose.
+
+    """
+    if not fmt:
+        fmt = ('jsonl', 'csv')[path.lower().endswith('.csv')]
+    root = os.path.dirname(os.path.abspath(path))
+    if fmt == 'csv':
+        records = _read_csv(path)
+    else:
+        records = _read_jsonl(path)
+    for edits in records:
+        file_path = edits.pop('path', None)
+        if not file_path:
+            logger.error('%s: record has no path', path)
+            continue
+        yield os.path.join(root, os.path.expanduser(file_path)), edits
+
+
+def _read_jsonl(path):
+    with io.open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _read_csv(path):
+    if six.PY2:
+        with open(path, 'rb') as f:
+            for row in csv.DictReader(f):
+                yield dict((k.decode('utf-8'), v.decode('utf-8'))
+                           for (k, v) in row.items())
+    else:
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                yield row
+
+
+def apply_edits(path, edits, if_mode=True, sc_mode='auto', force_iptc=False,
+                preserve_timestamps=False, verify='tags'):
+    """Set the values in the edits dict and save the file's metadata.
+
+    Returns None if successful, or an error message.
+
+    """
+    if not os.path.isfile(path):
+        return 'file not found'
+    md = Metadata(path)
+    for name, value in edits.items():
+        if name not in Metadata._data_type:
+            return 'unknown field "{}"'.format(name)
+        if (isinstance(value, six.string_types) and value and
+                Metadata._data_type[name] == DateTime):
+            value = DateTime.from_ISO_8601(value)
+        setattr(md, name, value)
+    file_times = None
+    if preserve_timestamps:
+        file_times = (os.path.getatime(path), os.path.getmtime(path))
+    return md.save(if_mode=if_mode, sc_mode=sc_mode, force_iptc=force_iptc,
+                   file_times=file_times, verify=verify)
+
+
+def _apply_job(job):
+    path, edits, options = job
+    try:
+        return path, apply_edits(path, edits, **options)
+    except Exception as ex:
+        logger.exception(ex)
+        return path, six.text_type(ex)
+
+
+def process(manifest, processes=None, fmt=None, **options):
+    """Apply all the edits in a manifest file.
+
+    Generates (file path, error) pairs, in order of completion. error
+    is None if the file was saved successfully. The files are processed
+    by a pool of processes (one per CPU if processes is None). Other
+    keyword arguments are passed to apply_edits.
+
+    """
+    jobs = ((path, edits, options)
+            for (path, edits) in read_manifest(manifest, fmt=fmt))
+    # remove stale entries from the GUI's metadata cache
+    try:
+        from photini.cache import MetadataCache
+        cache = MetadataCache()
+    except Exception as ex:
+        logger.error(str(ex))
+        cache = None
+    if processes == 1:
+        results = six.moves.map(_apply_job, jobs)
+    else:
+        pool = multiprocessing.Pool(processes)
+        results = pool.imap_unordered(_apply_job, jobs, chunksize=16)
+    for path, error in results:
+        if cache:
+            cache.remove(path)
+        yield path, error
+    if processes != 1:
+        pool.close()
+        pool.join()
+
+
+def main(argv=None):
+    config = BaseConfigStore('editor')
+    parser = OptionParser(
+        usage='Usage: %prog [options] manifest_file',
+        version='Photini ' + __version__,
+        description='Apply metadata edits listed in a JSON lines or CSV'
+        ' file. Default options are taken from the Photini editor'
+        ' settings.')
+    parser.add_option(
+        '-f', '--format', choices=('jsonl', 'csv'),
+        help='manifest file format (jsonl or csv)')
+    parser.add_option(
+        '-j', '--processes', type='int',
+        help='number of worker processes (default: one per CPU)')
+    parser.add_option(
+        '-s', '--sidecar', choices=('always', 'auto', 'delete'),
+        default=config.get('files', 'sidecar', 'auto'),
+        help='when to use sidecar files (always, auto or delete)')
+    parser.add_option(
+        '--no-image', action='store_false', dest='if_mode',
+        default=eval(config.get('files', 'image', 'True')),
+        help='do not write to image files')
+    parser.add_option(
+        '--force-iptc', action='store_true',
+        default=eval(config.get('files', 'force_iptc', 'False')),
+        help='write IPTC metadata even if the file has none')
+    parser.add_option(
+        '--preserve-timestamps', action='store_true',
+        default=eval(config.get('files', 'preserve_timestamps', 'False')),
+        help='keep file modification times')
+    parser.add_option(
+        '--verify', choices=('off', 'tags', 'full'),
+        default=config.get('files', 'verify', 'tags'),
+        help='how to check saved files (off, tags or full)')
+    parser.add_option(
+        '-v', '--verbose', action='count', default=0,
+        help='increase number of logging messages')
+    options, args = parser.parse_args(argv)
+    if len(args) != 1:
+        parser.error('one manifest file required')
+    logging.basicConfig(
+        level=max(logging.WARNING - (options.verbose * 10), logging.DEBUG),
+        format='%(levelname)s: %(message)s')
+    count = 0
+    failed = 0
+    for path, error in process(
+            args[0], processes=options.processes, fmt=options.format,
+            if_mode=options.if_mode, sc_mode=options.sidecar,
+            force_iptc=options.force_iptc,
+            preserve_timestamps=options.preserve_timestamps,
+            verify=options.verify):
+        count += 1
+        if error:
+            failed += 1
+            print('{}: {}'.format(path, error), file=sys.stderr)
+    print('{} files processed, {} failed'.format(count, failed))
+    return (0, 1)[failed > 0]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2019  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+from __future__ import unicode_literals
+
+from datetime import datetime
+import logging
+import os
+import sqlite3
+import threading
+
+import appdirs
+import six
+from six.moves import cPickle as pickle
+
+from photini import __version__
+
+logger = logging.getLogger(__name__)
+
+
+def _connect(path, name):
+    # open a database in Photini's cache directory, using write-ahead
+    # logging if the file system supports it
+    if not path:
+        cache_dir = appdirs.user_cache_dir('photini')
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        path = os.path.join(cache_dir, name)
+    connection = sqlite3.connect(path, check_same_thread=False)
+    try:
+        mode = connection.execute('PRAGMA journal_mode = WAL').fetchone()
+    except sqlite3.Error as ex:
+        logger.warning('%s: %s', path, str(ex))
+        mode = None
+    if not mode or mode[0].lower() != 'wal':
+        # e.g. a network file system without shared memory
+        connection.execute('PRAGMA journal_mode = DELETE')
+    connection.execute('PRAGMA synchronous = NORMAL')
+    return connection
+
+
+class MetadataCache(object):
+    """Persistent store of Photini metadata values, including
+    thumbnails, so files that haven't changed since they were last
+    opened don't need to be read again.
+
+    Entries are keyed by file path and are only valid if the size and
+    modification time of the file, and the modification time of its
+    sidecar (if any), are unchanged. The cache can be used from
+    several threads at once.
+
+    Thumbnails made from video files' frames ("posters") are stored
+    separately, as they aren't part of the file's metadata.
+
+    Entries for deleted or moved files, and the oldest entries if
+    there are too many, are removed by prune.
+
+    """
+    def __init__(self, path=None):
+        self.lock = threading.Lock()
+        self.connection = _connect(path, 'metadata.db')
+        with self.lock:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY,'
+                ' size INTEGER, mtime REAL, sc_mtime REAL, version TEXT,'
+                ' fields BLOB, thumbnail BLOB)')
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS posters (path TEXT PRIMARY KEY,'
+                ' size INTEGER, mtime REAL, poster BLOB)')
+            self.connection.commit()
+
+    @staticmethod
+    def file_key(path, sc_path):
+        stat = os.stat(path)
+        sc_mtime = None
+        if sc_path:
+            sc_mtime = os.path.getmtime(sc_path)
+        return stat.st_size, stat.st_mtime, sc_mtime
+
+    def get(self, path, key):
+        """Return dict of cached values, or None if there's no valid
+        entry for path."""
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    'SELECT size, mtime, sc_mtime, version, fields, thumbnail'
+                    ' FROM files WHERE path = ?', (path,)).fetchone()
+            if not row:
+                return None
+            if tuple(row[:3]) != tuple(key) or row[3] != __version__:
+                return None
+            values = pickle.loads(bytes(row[4]))
+            values['thumbnail'] = pickle.loads(bytes(row[5]))
+        except Exception as ex:
+            logger.exception(ex)
+            return None
+        return values
+
+    def put(self, path, key, values):
+        values = dict(values)
+        thumbnail = pickle.dumps(values.pop('thumbnail', None), 2)
+        fields = pickle.dumps(values, 2)
+        try:
+            with self.lock:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (path, key[0], key[1], key[2], __version__,
+                     sqlite3.Binary(fields), sqlite3.Binary(thumbnail)))
+                self.connection.commit()
+        except Exception as ex:
+            logger.exception(ex)
+
+    def remove(self, path):
+        try:
+            with self.lock:
+                self.connection.execute(
+                    'DELETE FROM files WHERE path = ?', (path,))
+                self.connection.commit()
+        except Exception as ex:
+            logger.exception(ex)
+
+    def prune(self, max_entries=20000):
+        """Remove entries for files that no longer exist, then the
+        oldest entries if there are more than max_entries.
+
+        Checking every file can be slow, so this is usually run in a
+        separate thread.
+
+        """
+        for table in ('files', 'posters'):
+            try:
+                with self.lock:
+                    paths = self.connection.execute(
+                        'SELECT path FROM {}'.format(table)).fetchall()
+                missing = [x for x in paths if not os.path.exists(x[0])]
+                with self.lock:
+                    self.connection.executemany(
+                        'DELETE FROM {} WHERE path = ?'.format(table), missing)
+                    # replacing an entry gives it a new rowid, so low
+                    # rowids are the least recently stored
+                    self.connection.execute(
+                        'DELETE FROM {0} WHERE rowid NOT IN (SELECT rowid'
+                        ' FROM {0} ORDER BY rowid DESC LIMIT ?)'.format(table),
+                        (max_entries,))
+                    self.connection.commit()
+            except Exception as ex:
+                logger.exception(ex)
+
+    def get_poster(self, path, key):
+        """Return cached poster thumbnail, or None if there's no valid
+        entry for path."""
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    'SELECT size, mtime, poster FROM posters WHERE path = ?',
+                    (path,)).fetchone()
+            if not row or tuple(row[:2]) != tuple(key[:2]):
+                return None
+            return pickle.loads(bytes(row[2]))
+        except Exception as ex:
+            logger.exception(ex)
+            return None
+
+    def put_poster(self, path, key, poster):
+        poster = pickle.dumps(poster, 2)
+        try:
+            with self.lock:
+                self.connection.execute(
+                    'INSERT OR REPLACE INTO posters VALUES (?, ?, ?, ?)',
+                    (path, key[0], key[1], sqlite3.Binary(poster)))
+                self.connection.commit()
+        except Exception as ex:
+            logger.exception(ex)
+
+
+class ImportIndex(object):
+    """Persistent store of the date and camera model of files in the
+    Importer's source folders, so a folder can be listed again without
+    reading every file.
+
+    Entries are grouped by the folder being imported from, and are
+    only valid if the size and modification time of the file are
+    unchanged.
+
+    """
+    def __init__(self, path=None):
+        self.lock = threading.Lock()
+        self.connection = _connect(path, 'import.db')
+        with self.lock:
+            self.connection.execute(
+                'CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY,'
+                ' root TEXT, name TEXT, size INTEGER, mtime REAL,'
+                ' timestamp TEXT, camera TEXT, version TEXT)')
+            self.connection.execute(
+                'CREATE INDEX IF NOT EXISTS files_root ON files (root)')
+            self.connection.commit()
+
+    def get_folder(self, root):
+        """Return dict of file data, keyed by path, of every file
+        indexed under root."""
+        result = {}
+        try:
+            with self.lock:
+                rows = self.connection.execute(
+                    'SELECT path, name, size, mtime, timestamp, camera'
+                    ' FROM files WHERE root = ? AND version = ?',
+                    (root, __version__)).fetchall()
+        except Exception as ex:
+            logger.exception(ex)
+            return result
+        for path, name, size, mtime, timestamp, camera in rows:
+            if len(timestamp) > 19:
+                fmt = '%Y-%m-%d %H:%M:%S.%f'
+            else:
+                fmt = '%Y-%m-%d %H:%M:%S'
+            timestamp = datetime.strptime(timestamp, fmt)
+            result[path] = {
+                'camera'    : camera,
+                'path'      : path,
+                'name'      : name,
+                'size'      : size,
+                'mtime'     : mtime,
+                'timestamp' : timestamp,
+                }
+        return result
+
+    def put(self, root, file_data_list):
+        rows = []
+        for file_data in file_data_list:
+            camera = file_data['camera']
+            if camera:
+                camera = six.text_type(camera)
+            rows.append((file_data['path'], root, file_data['name'],
+                         file_data['size'], file_data['mtime'],
+                         file_data['timestamp'].isoformat(' '), camera,
+                         __version__))
+        try:
+            with self.lock:
+                self.connection.executemany(
+                    'INSERT OR REPLACE INTO files VALUES'
+                    ' (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+                self.connection.commit()
+        except Exception as ex:
+            logger.exception(ex)
+
+    def prune(self, root, paths):
+        """Remove entries for files under root that aren't in paths."""
+        try:
+            with self.lock:
+                old_paths = self.connection.execute(
+                    'SELECT path FROM files WHERE root = ?',
+                    (root,)).fetchall()
+                self.connection.executemany(
+                    'DELETE FROM files WHERE path = ?',
+                    [x for x in old_paths if x[0] not in paths])
+                self.connection.commit()
+        except Exception as ex:
+            logger.exception(ex)
@@ -359,14 +359,9 @@ class Descriptive(QtWidgets.QWidget):
         self._update_widget(key)
 
     def _update_widget(self, key):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
             return
-        values = []
-        for image in images:
-            value = getattr(image.metadata, key)
-            if value not in values:
-                values.append(value)
+        values = self.image_list.summary.values(key)
         if len(values) > 1:
             self.widgets[key].set_multiple(choices=filter(None, values))
         else:
@@ -383,3 +378,6 @@ class Descriptive(QtWidgets.QWidget):
         for key in self.widgets:
             self._update_widget(key)
         self.setEnabled(True)
+
+    def update_selection(self, added, removed, selection):
+        self.new_selection(selection)
@@ -23,6 +23,7 @@ import logging
 from optparse import OptionParser
 import os
 import sys
+import threading
 from six.moves.urllib.request import getproxies
 from six.moves.urllib.parse import urlparse
 import webbrowser
@@ -30,6 +31,7 @@ import webbrowser
 import pkg_resources
 
 from photini.bingmap import BingMap
+from photini.cache import MetadataCache
 from photini.configstore import BaseConfigStore
 from photini.descriptive import Descriptive
 from photini.editsettings import EditSettings
@@ -43,6 +45,7 @@ from photini.imagelist import ImageList
 from photini.importer import Importer
 from photini.loggerwindow import LoggerWindow
 from photini.mapboxmap import MapboxMap
+from photini.metadata import Metadata
 from photini.openstreetmap import OpenStreetMap
 from photini.pyqt import (
     catch_all, Qt, QtCore, QtGui, QNetworkProxy, QtWidgets, qt_version_info,
@@ -108,6 +111,16 @@ class MainWindow(QtWidgets.QMainWindow):
         self.app.config_store = ConfigStore('editor', parent=self)
         self.app.spell_check = SpellCheck(parent=self)
         self.app.test_mode = options.test
+        if eval(self.app.config_store.get('files', 'use_cache', 'True')):
+            try:
+                Metadata.cache = MetadataCache()
+            except Exception as ex:
+                logger.warning('Metadata cache not available: %s', str(ex))
+        if Metadata.cache:
+            # remove stale entries without delaying start up
+            thread = threading.Thread(target=Metadata.cache.prune)
+            thread.daemon = True
+            thread.start()
         # restore size
         size = self.width(), self.height()
         self.resize(*eval(
@@ -115,6 +128,7 @@ class MainWindow(QtWidgets.QMainWindow):
         # image selector
         self.image_list = ImageList()
         self.image_list.selection_changed.connect(self.new_selection)
+        self.image_list.selection_delta.connect(self.new_selection_delta)
         self.image_list.new_metadata.connect(self.new_metadata)
         # prepare list of tabs and associated stuff
         self.tab_list = (
@@ -358,6 +372,12 @@ details click the 'show details' button.</p>
         self.close_action.setEnabled(len(selection) > 0)
         self.tabs.currentWidget().new_selection(selection)
 
+    @QtCore.pyqtSlot(list, list, list)
+    @catch_all
+    def new_selection_delta(self, added, removed, selection):
+        self.close_action.setEnabled(len(selection) > 0)
+        self.tabs.currentWidget().update_selection(added, removed, selection)
+
     @QtCore.pyqtSlot(bool)
     @catch_all
     def new_metadata(self, unsaved_data):
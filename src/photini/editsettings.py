@@ -93,6 +93,25 @@ class EditSettings(QtWidgets.QDialog):
         self.keep_time.setChecked(keep_time)
         panel.layout().addRow(
             self.tr('Preserve file timestamps'), self.keep_time)
+        # check saved files
+        verify = self.config_store.get('files', 'verify', 'tags')
+        self.verify_group = QtWidgets.QButtonGroup(self)
+        self.verify_off = QtWidgets.QRadioButton(self.tr('Off'))
+        self.verify_off.setChecked(verify == 'off')
+        self.verify_group.addButton(self.verify_off)
+        panel.layout().addRow(self.tr('Verify saved files'), self.verify_off)
+        self.verify_tags = QtWidgets.QRadioButton(self.tr('Check tag list'))
+        self.verify_tags.setChecked(verify == 'tags')
+        self.verify_group.addButton(self.verify_tags)
+        panel.layout().addRow('', self.verify_tags)
+        self.verify_full = QtWidgets.QRadioButton(self.tr('Check all values'))
+        self.verify_full.setChecked(verify == 'full')
+        self.verify_group.addButton(self.verify_full)
+        panel.layout().addRow('', self.verify_full)
+        self.verify_deferred = QtWidgets.QCheckBox(self.tr('In background'))
+        self.verify_deferred.setChecked(eval(
+            self.config_store.get('files', 'verify_deferred', 'False')))
+        panel.layout().addRow('', self.verify_deferred)
         # add panel to scroll area after its size is known
         scroll_area.setWidget(panel)
 
@@ -129,4 +148,13 @@ class EditSettings(QtWidgets.QDialog):
         self.config_store.set('files', 'image', str(self.write_if.isChecked()))
         self.config_store.set(
             'files', 'preserve_timestamps', str(self.keep_time.isChecked()))
+        if self.verify_off.isChecked():
+            verify = 'off'
+        elif self.verify_tags.isChecked():
+            verify = 'tags'
+        else:
+            verify = 'full'
+        self.config_store.set('files', 'verify', verify)
+        self.config_store.set('files', 'verify_deferred',
+                              str(self.verify_deferred.isChecked()))
         return self.accept()
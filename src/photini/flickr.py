@@ -614,11 +614,11 @@ class FlickrUploader(PhotiniUploader):
         buttons = {}
         for candidate in candidates:
             label = QtWidgets.QLabel()
-            pixmap = candidate.image.pixmap()
+            pixmap = candidate.get_pixmap()
             if pixmap:
                 label.setPixmap(pixmap)
             else:
-                label.setText(candidate.image.text())
+                label.setText(candidate.get_placeholder())
             button = QtWidgets.QPushButton(
                 os.path.basename(candidate.path))
             button.setToolTip(candidate.path)
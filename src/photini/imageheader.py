@@ -0,0 +1,523 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2019  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+"""Get the format and dimensions of an image by reading its header.
+
+Only a few hundred bytes are read (more for JPEG files with large
+metadata segments, but these are skipped rather than read) and no
+pixels are decoded. Format names are the same as those used by the
+standard library imghdr module.
+
+The camera model and dates can also be read from the Exif data of
+JPEG, TIFF (including most raw formats) and HEIF files, without using
+exiv2.
+
+"""
+
+from __future__ import unicode_literals
+
+from datetime import datetime
+import logging
+import struct
+
+import six
+
+logger = logging.getLogger(__name__)
+
+# JPEG start of frame markers, excluding DHT, JPG and DAC
+_jpeg_sof = set(range(0xc0, 0xd0)) - set((0xc4, 0xc8, 0xcc))
+# JPEG markers with no length field
+_jpeg_standalone = set(range(0xd0, 0xd9)) | set((0x01,))
+# HEIF file brands
+_heif_brands = (b'heic', b'heix', b'heim', b'heis', b'mif1', b'msf1')
+
+
+def read_header(f):
+    """Return (format, width, height) of the image in file object f.
+
+    format is None if the image type isn't recognised. width and height
+    are None if they couldn't be found, e.g. if the file is truncated.
+
+    """
+    start = f.read(32)
+    fmt = _format(start)
+    if not fmt:
+        return None, None, None
+    try:
+        if fmt in _size_funcs:
+            f.seek(0)
+            return (fmt,) + _size_funcs[fmt](f)
+    except (struct.error, ValueError):
+        # corrupt or truncated
+        pass
+    return fmt, None, None
+
+
+def _format(start):
+    # same formats as the imghdr module
+    if start[:2] == b'\xff\xd8':
+        return 'jpeg'
+    if start[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if start[:4] in (b'II*\x00', b'MM\x00*'):
+        return 'tiff'
+    if start[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    if start[:2] == b'BM':
+        return 'bmp'
+    if start[:4] == b'RIFF' and start[8:12] == b'WEBP':
+        return 'webp'
+    if len(start) >= 3 and start[:1] == b'P' and start[2:3] in b' \t\n\r':
+        fmt = {b'1': 'pbm', b'4': 'pbm', b'2': 'pgm', b'5': 'pgm',
+               b'3': 'ppm', b'6': 'ppm'}.get(start[1:2])
+        if fmt:
+            return fmt
+    if start[:2] == b'\x01\xda':
+        return 'rgb'
+    if start[:4] == b'\x59\xa6\x6a\x95':
+        return 'rast'
+    if start[:8] == b'#define ':
+        return 'xbm'
+    if start[:4] == b'\x76\x2f\x31\x01':
+        return 'exr'
+    return None
+
+
+def probe_data(data):
+    """Return (format, width, height) of the image in a bytes object."""
+    return read_header(six.BytesIO(data))
+
+
+def probe_file(path):
+    """Return (format, width, height) of the image file path."""
+    try:
+        with open(path, 'rb') as f:
+            return read_header(f)
+    except (IOError, OSError) as ex:
+        logger.error(str(ex))
+        return None, None, None
+
+
+def _unpack(f, fmt):
+    size = struct.calcsize(fmt)
+    data = f.read(size)
+    if len(data) < size:
+        return (None,) * len(struct.unpack(fmt, b'\x00' * size))
+    return struct.unpack(fmt, data)
+
+
+def _png_size(f):
+    f.seek(8)
+    if f.read(8) != b'\x00\x00\x00\x0dIHDR':
+        return None, None
+    return _unpack(f, '>II')
+
+
+def _gif_size(f):
+    f.seek(6)
+    return _unpack(f, '<HH')
+
+
+def _bmp_size(f):
+    f.seek(14)
+    header_size, = _unpack(f, '<I')
+    if header_size == 12:
+        return _unpack(f, '<HH')
+    w, h = _unpack(f, '<ii')
+    if h is not None:
+        # negative height means rows are stored top down
+        h = abs(h)
+    return w, h
+
+
+def _webp_size(f):
+    f.seek(12)
+    chunk, = _unpack(f, '4s')
+    f.seek(20)
+    if chunk == b'VP8 ':
+        f.seek(6, 1)
+        w, h = _unpack(f, '<HH')
+        if h is not None:
+            w, h = w & 0x3fff, h & 0x3fff
+        return w, h
+    if chunk == b'VP8L':
+        signature, bits = _unpack(f, '<BI')
+        if bits is None:
+            return None, None
+        return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+    if chunk == b'VP8X':
+        f.seek(4, 1)
+        data = f.read(6)
+        if len(data) < 6:
+            return None, None
+        w, h = struct.unpack('<II', data[:3] + b'\x00' + data[3:] + b'\x00')
+        return w + 1, h + 1
+    return None, None
+
+
+def _pnm_size(f):
+    # width and height are the 2nd and 3rd words, ignoring comments
+    data = f.read(256)
+    words = []
+    for line in data.splitlines():
+        words += line.split(b'#')[0].split()
+        if len(words) >= 3:
+            return int(words[1]), int(words[2])
+    return None, None
+
+
+def _rgb_size(f):
+    f.seek(6)
+    return _unpack(f, '>HH')
+
+
+def _rast_size(f):
+    f.seek(4)
+    return _unpack(f, '>II')
+
+
+def _jpeg_size(f):
+    # skip the SOI marker
+    f.seek(2)
+    while True:
+        data = f.read(1)
+        if not data:
+            break
+        if data != b'\xff':
+            # not a marker, file is corrupt
+            break
+        # skip any fill bytes
+        while data == b'\xff':
+            data = f.read(1)
+        if not data:
+            break
+        marker = six.indexbytes(data, 0)
+        if marker in _jpeg_standalone:
+            continue
+        if marker == 0xda:
+            # start of scan, no SOF found
+            break
+        length, = _unpack(f, '>H')
+        if not length or length < 2:
+            break
+        if marker in _jpeg_sof:
+            precision, h, w = _unpack(f, '>BHH')
+            return w, h
+        f.seek(length - 2, 1)
+    return None, None
+
+
+def read_ifd(f, offset, byte_order):
+    """Return a dict of {tag: (type, count, value)} for a TIFF IFD.
+
+    value is the raw 4 bytes of the entry, which contain either the
+    value or the offset of the value.
+
+    """
+    f.seek(offset)
+    count, = _unpack(f, byte_order + 'H')
+    if not count:
+        return {}
+    data = f.read(count * 12)
+    result = {}
+    for i in range(len(data) // 12):
+        tag, type_, n = struct.unpack(
+            byte_order + 'HHI', data[i * 12:(i * 12) + 8])
+        result[tag] = type_, n, data[(i * 12) + 8:(i * 12) + 12]
+    return result
+
+
+def ifd_int(entry, byte_order):
+    """Convert a SHORT or LONG IFD entry to an int."""
+    type_, n, value = entry
+    if type_ == 3:
+        return struct.unpack(byte_order + 'H', value[:2])[0]
+    if type_ == 4:
+        return struct.unpack(byte_order + 'I', value)[0]
+    return None
+
+
+def tiff_byte_order(f):
+    """Return struct byte order character and offset of IFD0, or
+    (None, None) if f isn't a TIFF file."""
+    start = f.read(8)
+    if len(start) < 8:
+        return None, None
+    if start[:4] == b'II*\x00':
+        byte_order = '<'
+    elif start[:4] == b'MM\x00*':
+        byte_order = '>'
+    else:
+        return None, None
+    return byte_order, struct.unpack(byte_order + 'I', start[4:])[0]
+
+
+def _tiff_size(f):
+    byte_order, offset = tiff_byte_order(f)
+    if not byte_order:
+        return None, None
+    ifd = read_ifd(f, offset, byte_order)
+    if 256 not in ifd or 257 not in ifd:
+        return None, None
+    return ifd_int(ifd[256], byte_order), ifd_int(ifd[257], byte_order)
+
+
+def read_exif(f):
+    """Return a dict of camera_model, date_taken, date_digitised and
+    date_modified from the Exif data in file object f.
+
+    Dates are naive datetime objects, including any sub-seconds. Values
+    that aren't present are None. Returns None if f has no Exif data
+    or isn't a recognised format.
+
+    """
+    start = f.read(12)
+    if start[:2] == b'\xff\xd8':
+        f.seek(2)
+        tiff = _jpeg_exif(f)
+    elif start[:4] in (b'II*\x00', b'MM\x00*'):
+        tiff = f
+    elif start[4:8] == b'ftyp' and start[8:12] in _heif_brands:
+        f.seek(0)
+        tiff = _heif_exif(f)
+    else:
+        return None
+    if not tiff:
+        return None
+    tiff.seek(0)
+    byte_order, offset = tiff_byte_order(tiff)
+    if not byte_order:
+        return None
+    ifd0 = read_ifd(tiff, offset, byte_order)
+    exif_ifd = {}
+    if 0x8769 in ifd0:
+        type_, n, value = ifd0[0x8769]
+        if type_ == 13:
+            # IFD type is the same as LONG
+            type_ = 4
+        offset = ifd_int((type_, n, value), byte_order)
+        if offset:
+            exif_ifd = read_ifd(tiff, offset, byte_order)
+    return {
+        'camera_model'   : _ifd_str(tiff, ifd0.get(0x0110), byte_order),
+        'date_taken'     : _ifd_datetime(
+            tiff, exif_ifd.get(0x9003), exif_ifd.get(0x9291), byte_order),
+        'date_digitised' : _ifd_datetime(
+            tiff, exif_ifd.get(0x9004), exif_ifd.get(0x9292), byte_order),
+        'date_modified'  : _ifd_datetime(
+            tiff, ifd0.get(0x0132), exif_ifd.get(0x9290), byte_order),
+        }
+
+
+def probe_exif(path):
+    """Return camera model and dates of the image file path, or None if
+    they couldn't be read. See read_exif."""
+    try:
+        with open(path, 'rb') as f:
+            return read_exif(f)
+    except (IOError, OSError) as ex:
+        logger.error(str(ex))
+    except (KeyError, struct.error, TypeError, ValueError):
+        # corrupt or unexpected data
+        pass
+    return None
+
+
+def _jpeg_exif(f):
+    # return Exif data (a TIFF file) from the APP1 segment
+    while True:
+        data = f.read(1)
+        if data != b'\xff':
+            break
+        while data == b'\xff':
+            data = f.read(1)
+        if not data:
+            break
+        marker = six.indexbytes(data, 0)
+        if marker in _jpeg_standalone:
+            continue
+        if marker == 0xda or marker in _jpeg_sof:
+            # Exif data must come before the image data
+            break
+        length, = _unpack(f, '>H')
+        if not length or length < 2:
+            break
+        if marker == 0xe1:
+            data = f.read(length - 2)
+            if data[:6] == b'Exif\x00\x00':
+                return six.BytesIO(data[6:])
+            continue
+        f.seek(length - 2, 1)
+    return None
+
+
+def _boxes(f, end):
+    # iterate over ISO base media file format boxes, yielding
+    # (type, start of content, end of box)
+    pos = f.tell()
+    while pos + 8 <= end:
+        f.seek(pos)
+        size, box_type = _unpack(f, '>I4s')
+        if size is None:
+            return
+        start = pos + 8
+        if size == 1:
+            size, = _unpack(f, '>Q')
+            start += 8
+        elif size == 0:
+            size = end - pos
+        if size is None or size < start - pos:
+            return
+        yield box_type, start, pos + size
+        pos += size
+
+
+def _heif_exif(f):
+    # find the Exif item in the meta box, then read it
+    f.seek(0, 2)
+    file_end = f.tell()
+    f.seek(0)
+    for box_type, start, end in _boxes(f, file_end):
+        if box_type == b'meta':
+            break
+    else:
+        return None
+    exif_id = None
+    locations = {}
+    # meta is a full box, with 4 bytes of version and flags
+    f.seek(start + 4)
+    for box_type, start, end in _boxes(f, end):
+        f.seek(start)
+        version, = _unpack(f, '>B')
+        f.seek(3, 1)
+        if box_type == b'iinf':
+            count, = _unpack(f, ('>H', '>I')[version > 0])
+            for box_type, start, end in _boxes(f, end):
+                if box_type != b'infe':
+                    continue
+                f.seek(start)
+                version, = _unpack(f, '>B')
+                if version < 2:
+                    continue
+                f.seek(3, 1)
+                item_id, protection, item_type = _unpack(
+                    f, ('>HH4s', '>IH4s')[version > 2])
+                if item_type == b'Exif':
+                    exif_id = item_id
+                    break
+        elif box_type == b'iloc':
+            locations = _heif_locations(f, version)
+        f.seek(end)
+    if exif_id not in locations:
+        return None
+    offset, length = locations[exif_id]
+    f.seek(offset)
+    data = f.read(length)
+    # item starts with offset of TIFF header
+    skip, = struct.unpack('>I', data[:4])
+    return six.BytesIO(data[4 + skip:])
+
+
+def _heif_locations(f, version):
+    # return {item_id: (offset, length)} of the first extent of items
+    # stored in the file
+    sizes = {0: None, 4: 'I', 8: 'Q'}
+    a, b = _unpack(f, '>BB')
+    offset_size = sizes[a >> 4]
+    length_size = sizes[a & 0x0f]
+    base_offset_size = sizes[b >> 4]
+    index_size = None
+    if version in (1, 2):
+        index_size = sizes[b & 0x0f]
+    count, = _unpack(f, ('>H', '>H', '>I')[version])
+    result = {}
+    for i in range(count):
+        item_id, = _unpack(f, ('>H', '>H', '>I')[version])
+        method = 0
+        if version in (1, 2):
+            method, = _unpack(f, '>H')
+            method &= 0x0f
+        fmt = '>H'
+        if base_offset_size:
+            fmt += base_offset_size
+        fmt += 'H'
+        values = _unpack(f, fmt)
+        base_offset = 0
+        if base_offset_size:
+            base_offset = values[1]
+        extent_count = values[-1]
+        fmt = '>'
+        for size in (index_size, offset_size, length_size):
+            if size:
+                fmt += size
+        for j in range(extent_count):
+            values = list(_unpack(f, fmt))
+            if j or method != 0:
+                continue
+            length = 0
+            if length_size:
+                length = values.pop()
+            offset = 0
+            if offset_size:
+                offset = values.pop()
+            result[item_id] = base_offset + offset, length
+    return result
+
+
+def _ifd_str(f, entry, byte_order):
+    # get an ASCII IFD entry's value, which may be stored elsewhere
+    if not entry or entry[0] != 2:
+        return None
+    type_, n, value = entry
+    if n > 4:
+        f.seek(struct.unpack(byte_order + 'I', value)[0])
+        value = f.read(n)
+    value = value[:n].split(b'\x00')[0].strip()
+    if not value:
+        return None
+    return value.decode('utf-8', 'replace')
+
+
+def _ifd_datetime(f, entry, sub_sec, byte_order):
+    value = _ifd_str(f, entry, byte_order)
+    if not value:
+        return None
+    try:
+        result = datetime.strptime(value[:19], '%Y:%m:%d %H:%M:%S')
+    except ValueError:
+        # blank or invalid date
+        return None
+    sub_sec = _ifd_str(f, sub_sec, byte_order)
+    if sub_sec and sub_sec.isdigit():
+        result = result.replace(microsecond=int(sub_sec[:6].ljust(6, '0')))
+    return result
+
+
+_size_funcs = {
+    'bmp'  : _bmp_size,
+    'gif'  : _gif_size,
+    'jpeg' : _jpeg_size,
+    'pbm'  : _pnm_size,
+    'pgm'  : _pnm_size,
+    'png'  : _png_size,
+    'ppm'  : _pnm_size,
+    'rast' : _rast_size,
+    'rgb'  : _rgb_size,
+    'tiff' : _tiff_size,
+    'webp' : _webp_size,
+    }
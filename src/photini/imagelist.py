@@ -20,8 +20,9 @@
 from __future__ import unicode_literals
 
 import six
+import bisect
+from collections import OrderedDict
 from datetime import datetime
-import imghdr
 import logging
 import mimetypes
 import os
@@ -39,15 +40,305 @@ try:
 except ImportError:
     PIL = None
 
-from photini.metadata import Metadata, MultiString
+from photini.imageheader import probe_file
+from photini.metadata import get_preview, Metadata, MultiString, Thumbnail
 from photini.pyqt import (
-    Busy, catch_all, image_types, Qt, QtCore, QtGui, QtWidgets, qt_version_info,
-    scale_font, set_symbol_font, video_types)
+    Busy, catch_all, image_types, ProgressDisplay, Qt, QtCore, QtGui,
+    QtWidgets, qt_version_info, scale_font, set_symbol_font, video_types,
+    WorkerPool)
+from photini.summary import SelectionSummary
 
 logger = logging.getLogger(__name__)
 DRAG_MIMETYPE = 'application/x-photini-image'
 
 
+# Video "poster" frames. The first few frames of a video are often
+# black, so frames are tried at intervals until a reasonably bright one
+# is found.
+
+_poster_positions = (0.0, 0.1, 0.25, 0.5)
+_poster_min_brightness = 32
+
+def get_video_frame(path):
+    if not cv2:
+        return
+    video = cv2.VideoCapture(path)
+    if not video.isOpened():
+        return
+    frame_count = video.get(cv2.CAP_PROP_FRAME_COUNT)
+    cv_image = None
+    for position in _poster_positions:
+        if position and frame_count > 0:
+            video.set(cv2.CAP_PROP_POS_FRAMES, int(frame_count * position))
+        OK, frame = video.read()
+        if not OK:
+            break
+        cv_image = frame
+        if cv_image.mean() >= _poster_min_brightness:
+            break
+        if frame_count <= 0:
+            # can't seek, so just use first frame
+            break
+    video.release()
+    if cv_image is None:
+        return
+    if cv_image.ndim == 2 or cv_image.shape[2] == 1:
+        # assume Y
+        rgb_image = cv2.cvtColor(cv_image, cv2.COLOR_GRAY2RGB)
+    elif cv_image.shape[2] == 4:
+        # assume BGRA
+        rgb_image = cv2.cvtColor(cv_image, cv2.COLOR_BGRA2RGB)
+    elif cv_image.shape[2] == 3:
+        # assume BGR
+        rgb_image = cv2.cvtColor(cv_image, cv2.COLOR_BGR2RGB)
+    else:
+        return
+    rgb_image = np.ascontiguousarray(rgb_image)
+    height, width, channel = rgb_image.shape
+    qt_im = QtGui.QImage(rgb_image.data, width, height,
+                         rgb_image.strides[0], QtGui.QImage.Format_RGB888)
+    # attach rgb_image so it isn't deleted until qt_im is
+    qt_im._data = rgb_image
+    return qt_im
+
+
+def make_poster(path):
+    """Make a thumbnail from a video file's frames, or get it from the
+    metadata cache if it's been made before."""
+    cache = Metadata.cache
+    if cache:
+        key = cache.file_key(path, None)
+        result = cache.get_poster(path, key)
+        if result:
+            return result
+    qt_im = get_video_frame(path)
+    if not qt_im:
+        return None
+    result = make_thumbnail(path, 'video', None, qt_im=qt_im)
+    if result and cache:
+        cache.put_poster(path, key, result)
+    return result
+
+
+def reload_file(item):
+    """Read a file's metadata again if its size or modification time
+    (or its sidecar's) has changed since file_stamp was taken.
+
+    Returns the result of Metadata.read_file, or None if the file is
+    unchanged or has been deleted.
+
+    """
+    path, file_stamp = item
+    try:
+        if Metadata.file_stamp(path) == file_stamp:
+            return None
+    except OSError:
+        # deleted, or about to be replaced
+        return None
+    return Metadata.read_file(path)
+
+
+def transform(pixmap, orientation, inverse=False):
+    orientation = (orientation or 1) - 1
+    if not orientation:
+        return pixmap
+    # need to rotate and or reflect image
+    transform = QtGui.QTransform()
+    if orientation & 0b001:
+        # reflect left-right
+        transform = transform.scale(-1.0, 1.0)
+    if orientation & 0b010:
+        transform = transform.rotate(180.0)
+    if orientation & 0b100:
+        # transpose horizontal & vertical
+        transform = QtGui.QTransform(0, 1, 1, 0, 1, 1) * transform
+    if inverse:
+        transform = transform.transposed()
+    return pixmap.transformed(transform)
+
+
+# Thumbnails are made from images decoded at reduced size where
+# possible: PIL's "draft" mode for JPEG files (and the JPEG previews
+# embedded in raw files), or QImageReader's scaled size for other
+# formats. The decoded image is at least twice the thumbnail size, to
+# leave something for the final high quality resize. QImage is used
+# rather than QPixmap, so thumbnails can be made in worker threads.
+
+_decode_size = 320
+
+def _read_pil(fp):
+    pil_im = PIL.open(fp)
+    # decode JPEG at 1/2, 1/4 or 1/8 size
+    pil_im.draft('RGB', (_decode_size, _decode_size))
+    return pil_im.convert('RGB')
+
+
+def _read_qt(path):
+    reader = QtGui.QImageReader(path)
+    size = reader.size()
+    if size.isValid():
+        # QSize.scaled isn't in Qt 4
+        scaled = QtCore.QSize(size)
+        scaled.scale(_decode_size, _decode_size,
+                     Qt.KeepAspectRatioByExpanding)
+        if scaled.width() < size.width():
+            reader.setScaledSize(scaled)
+    return reader.read()
+
+
+def _qt_to_pil(qt_im):
+    qt_im = qt_im.convertToFormat(QtGui.QImage.Format_RGB888)
+    data = qt_im.bits()
+    data.setsize(qt_im.byteCount())
+    return PIL.frombuffer('RGB', (qt_im.width(), qt_im.height()),
+                          data.asstring(), 'raw', 'RGB',
+                          qt_im.bytesPerLine(), 1)
+
+
+def make_thumbnail(path, file_type, orientation, qt_im=None):
+    """Make a thumbnail from an image or video file, or from an image
+    that has already been read.
+
+    Returns (data, fmt, w, h), suitable for Metadata.thumbnail, or None
+    if the image can't be read.
+
+    """
+    pil_im = None
+    preview = None
+    if not qt_im:
+        image_fmt = probe_file(path)[0]
+        if image_fmt not in ('jpeg', 'png', 'gif') and not (
+                file_type.startswith('video')):
+            # raw files have embedded previews, with the same orientation
+            # as the raw data, that are much quicker to decode
+            preview = get_preview(path, _decode_size)
+        if PIL and (preview or image_fmt == 'jpeg'):
+            try:
+                pil_im = _read_pil(BytesIO(preview) if preview else path)
+            except Exception as ex:
+                logger.error('%s: %s', path, str(ex))
+        elif preview:
+            qt_im = QtGui.QImage.fromData(preview)
+    if pil_im:
+        w, h = pil_im.size
+    else:
+        if not qt_im or qt_im.isNull():
+            qt_im = _read_qt(path)
+            preview = None
+        if file_type.startswith('video') and qt_im.isNull():
+            # use OpenCV to read first frame
+            qt_im = get_video_frame(path)
+        if not qt_im or qt_im.isNull():
+            return None
+        # reorient if required
+        if not preview and file_type in (
+                'image/x-canon-cr2', 'image/x-nikon-nef'):
+            qt_im = transform(qt_im, orientation, inverse=True)
+        w = qt_im.width()
+        h = qt_im.height()
+    # DCF spec says thumbnail must be 160 x 120 so pad picture to 4:3
+    # aspect ratio
+    if w >= h:
+        new_w, new_h = max(w, (h * 4) // 3), max(h, (w * 3) // 4)
+        thumb_w, thumb_h = 160, 120
+    else:
+        new_w, new_h = max(w, (h * 3) // 4), max(h, (w * 4) // 3)
+        thumb_w, thumb_h = 120, 160
+    x, y = (w - new_w) // 2, (h - new_h) // 2
+    fmt = 'JPEG'
+    if PIL:
+        if not pil_im:
+            pil_im = _qt_to_pil(qt_im)
+        pil_im = pil_im.crop((x, y, x + new_w, y + new_h))
+        pil_im = pil_im.resize((thumb_w, thumb_h), PIL.LANCZOS)
+        data = BytesIO()
+        pil_im.save(data, fmt)
+        data = data.getvalue()
+    else:
+        # scale Qt image - not as good quality as PIL
+        qt_im = qt_im.copy(x, y, new_w, new_h).scaled(
+            thumb_w, thumb_h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+        buf = QtCore.QBuffer()
+        buf.open(QtCore.QIODevice.WriteOnly)
+        qt_im.save(buf, fmt)
+        data = buf.data().data()
+    return data, fmt, thumb_w, thumb_h
+
+
+class PixmapCache(object):
+    """Decoded and reoriented thumbnail pixmaps, at each display size.
+
+    Entries are discarded, least recently used first, to keep the total
+    size of the pixmaps within budget bytes. An entry is only valid
+    while the image's thumbnail and orientation are unchanged.
+
+    """
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.entries = OrderedDict()
+
+    def get(self, image, size):
+        """Return a pixmap of image's thumbnail scaled to fit size,
+        or None if it doesn't have a usable thumbnail."""
+        thumb = image.metadata.thumbnail or image.poster
+        orientation = image.metadata.orientation
+        if not thumb:
+            return None
+        pixmap = self._lookup((image.path, size), thumb, orientation)
+        if pixmap:
+            return pixmap
+        # size 0 is the full size thumbnail, to scale from
+        base = self._lookup((image.path, 0), thumb, orientation)
+        if not base:
+            base = QtGui.QPixmap()
+            base.loadFromData(thumb.data)
+            if base.isNull():
+                return None
+            base = transform(base, orientation)
+            self._store((image.path, 0), thumb, orientation, base)
+        pixmap = base.scaled(
+            size, size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        self._store((image.path, size), thumb, orientation, pixmap)
+        return pixmap
+
+    def discard(self, path):
+        for key in [x for x in self.entries if x[0] == path]:
+            self._remove(key)
+
+    def retain(self, paths):
+        # release pixmaps of any images not in paths
+        for key in [x for x in self.entries if x[0] not in paths]:
+            self._remove(key)
+
+    def _lookup(self, key, thumb, orientation):
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return None
+        if entry[0] is not thumb or entry[1] != orientation:
+            self.used -= self._cost(entry[2])
+            return None
+        # re-insert to make it most recently used
+        self.entries[key] = entry
+        return entry[2]
+
+    def _store(self, key, thumb, orientation, pixmap):
+        self._remove(key)
+        self.entries[key] = thumb, orientation, pixmap
+        self.used += self._cost(pixmap)
+        while self.used > self.budget and len(self.entries) > 1:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry:
+            self.used -= self._cost(entry[2])
+
+    @staticmethod
+    def _cost(pixmap):
+        return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
+
 class TableWidget(QtWidgets.QTableWidget):
     @catch_all
     def sizeHint(self):
@@ -57,7 +348,11 @@ class TableWidget(QtWidgets.QTableWidget):
                             v_hdr.length() + h_hdr.sizeHint().height() + 4)
 
 
-class Image(QtWidgets.QFrame):
+class Image(QtCore.QObject):
+    """An image file and its metadata. The thumbnail is drawn by
+    ImageList's view, so an Image doesn't need any widgets of its own.
+
+    """
     def __init__(self, path, image_list, thumb_size=80, *arg, **kw):
         super(Image, self).__init__(*arg, **kw)
         self.path = path
@@ -65,55 +360,41 @@ class Image(QtWidgets.QFrame):
         self.name, ext = os.path.splitext(os.path.basename(self.path))
         self.selected = False
         self.thumb_size = thumb_size
-        # read metadata
-        self.metadata = Metadata(self.path)
-        self.metadata.unsaved.connect(self.show_status)
+        # status symbols drawn next to the file name
+        self.status = ''
+        # thumbnail made from a video file, if it has no thumbnail
+        self.poster = None
+        # metadata is set later, possibly after reading in a worker thread
+        self.metadata = None
+        # date sort key, and the date values it was computed from
+        self._date_key = None
+        self._key_dates = None
+
+    def set_metadata(self, metadata):
+        self.metadata = metadata
+        self.metadata.notify = self.show_status
         self.file_times = (os.path.getatime(self.path),
                            os.path.getmtime(self.path))
+        self.file_stamp = Metadata.file_stamp(self.path)
         # set file type
         self.file_type = self.metadata.get_mime_type()
         if not self.file_type:
             self.file_type = mimetypes.guess_type(self.path)[0]
         if not self.file_type:
-            self.file_type = imghdr.what(self.path)
+            self.file_type = probe_file(self.path)[0]
             if self.file_type:
                 self.file_type = 'image/' + self.file_type
         # anything not recognised is assumed to be 'raw'
         if not self.file_type:
             self.file_type = 'image/raw'
-        # sub widgets
-        layout = QtWidgets.QGridLayout()
-        layout.setSpacing(0)
-        layout.setContentsMargins(3, 3, 3, 3)
-        self.setLayout(layout)
-        self.setToolTip(self.path)
-        # label to display image
-        self.image = QtWidgets.QLabel()
-        self.image.setAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
-        layout.addWidget(self.image, 0, 0, 1, 2)
-        # label to display file name
-        self.label = QtWidgets.QLabel()
-        self.label.setAlignment(Qt.AlignRight)
-        scale_font(self.label, 80)
-        layout.addWidget(self.label, 1, 1)
-        # label to display status
-        self.status = QtWidgets.QLabel()
-        self.status.setAlignment(Qt.AlignLeft)
-        set_symbol_font(self.status)
-        scale_font(self.status, 80)
-        layout.addWidget(self.status, 1, 0)
-        self.setFrameStyle(QtWidgets.QFrame.Panel | QtWidgets.QFrame.Plain)
-        self.setObjectName("thumbnail")
-        self.set_selected(False)
-        self.show_status(False)
-        self._set_thumb_size(self.thumb_size)
+        self.image_list.summary.update(self)
+        # reloaded metadata may still have unsaved edits
+        self.show_status(self.metadata.changed())
 
     @QtCore.pyqtSlot()
     @catch_all
     def reload_metadata(self):
-        self.metadata = Metadata(self.path)
-        self.metadata.unsaved.connect(self.show_status)
-        self.show_status(False)
+        self.set_metadata(Metadata(self.path))
         self.load_thumbnail()
         self.image_list.emit_selection()
 
@@ -125,7 +406,7 @@ class Image(QtWidgets.QFrame):
     @QtCore.pyqtSlot()
     @catch_all
     def diff_metadata(self):
-        dialog = QtWidgets.QDialog(parent=self)
+        dialog = QtWidgets.QDialog(parent=self.image_list)
         dialog.setWindowTitle(self.tr('Metadata differences'))
         dialog.setLayout(QtWidgets.QVBoxLayout())
         table = TableWidget()
@@ -190,172 +471,565 @@ class Image(QtWidgets.QFrame):
         elif changed:
             self.image_list.emit_selection()
 
-    def get_video_frame(self):
-        if not cv2:
-            return
-        video = cv2.VideoCapture(self.path)
-        if not video.isOpened():
-            return
-        OK, cv_image = video.read()
-        if not OK:
-            return
-        height, width, channel = cv_image.shape
-        fmt = QtGui.QImage.Format_RGB888
-        # need to pad to 4 pixel multiple
-        new_width = width - (width % -4)
-        if channel == 4:
-            # assume BGRA
-            fmt = QtGui.QImage.Format_ARGB32
-            np_image = np.empty((height, new_width, channel), dtype=np.uint8)
-            np_image[ : , :width, 0] = cv_image[ : , : , 3]
-            np_image[ : , :width, 1] = cv_image[ : , : , 2]
-            np_image[ : , :width, 2] = cv_image[ : , : , 1]
-            np_image[ : , :width, 3] = cv_image[ : , : , 0]
-        elif channel == 3:
-            # assume BGR
-            np_image = np.empty((height, new_width, channel), dtype=np.uint8)
-            np_image[ : , :width, 0] = cv_image[ : , : , 2]
-            np_image[ : , :width, 1] = cv_image[ : , : , 1]
-            np_image[ : , :width, 2] = cv_image[ : , : , 0]
-        elif channel == 1:
-            # assume Y
-            channel = 3
-            np_image = np.empty((height, new_width, channel), dtype=np.uint8)
-            np_image[ : , :width, 0] = cv_image[ : , : , 0]
-            np_image[ : , :width, 1] = cv_image[ : , : , 0]
-            np_image[ : , :width, 2] = cv_image[ : , : , 0]
-        else:
-            return
-        bpl = new_width * channel
-        qt_im = QtGui.QImage(np_image.data, width, height, bpl, fmt)
-        # attach np_image so it isn't deleted until qt_im is
-        qt_im._data = np_image
-        return qt_im
-
-    def transform(self, pixmap, orientation, inverse=False):
-        orientation = (orientation or 1) - 1
-        if not orientation:
-            return pixmap
-        # need to rotate and or reflect image
-        transform = QtGui.QTransform()
-        if orientation & 0b001:
-            # reflect left-right
-            transform = transform.scale(-1.0, 1.0)
-        if orientation & 0b010:
-            transform = transform.rotate(180.0)
-        if orientation & 0b100:
-            # transpose horizontal & vertical
-            transform = QtGui.QTransform(0, 1, 1, 0, 1, 1) * transform
-        if inverse:
-            transform = transform.transposed()
-        return pixmap.transformed(transform)
-
     @QtCore.pyqtSlot()
     @catch_all
     def regenerate_thumbnail(self):
-        with Busy():
-            # get Qt image first
-            qt_im = QtGui.QImage(self.path)
-            if self.file_type.startswith('video') and qt_im.isNull():
-                # use OpenCV to read first frame
-                qt_im = self.get_video_frame()
-            if not qt_im or qt_im.isNull():
-                logger.error('Cannot read %s image data from %s',
-                             self.file_type, self.path)
-                return
-            # reorient if required
-            if self.file_type in ('image/x-canon-cr2', 'image/x-nikon-nef'):
-                qt_im = self.transform(
-                    qt_im, self.metadata.orientation, inverse=True)
-            w = qt_im.width()
-            h = qt_im.height()
-            # use Qt's scaling (not high quality) to pre-shrink very
-            # large images, to avoid PIL "DecompressionBombWarning"
-            if max(w, h) >= 6000:
-                qt_im = qt_im.scaled(
-                    6000, 6000, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                w = qt_im.width()
-                h = qt_im.height()
-            # DCF spec says thumbnail must be 160 x 120 so pad picture
-            # to 4:3 aspect ratio
-            if w >= h:
-                new_h = int(0.5 + (float(w * 3) / 4.0))
-                new_w = int(0.5 + (float(h * 4) / 3.0))
-                if new_h > h:
-                    pad = (new_h - h) // 2
-                    qt_im = qt_im.copy(0, -pad, w, new_h)
-                elif new_w > w:
-                    pad = (new_w - w) // 2
-                    qt_im = qt_im.copy(-pad, 0, new_w, h)
-                w, h = 160, 120
-            else:
-                new_h = int(0.5 + (float(w * 4) / 3.0))
-                new_w = int(0.5 + (float(h * 3) / 4.0))
-                if new_w > w:
-                    pad = (new_w - w) // 2
-                    qt_im = qt_im.copy(-pad, 0, new_w, h)
-                elif new_h > h:
-                    pad = (new_h - h) // 2
-                    qt_im = qt_im.copy(0, -pad, w, new_h)
-                w, h = 120, 160
-            fmt = 'JPEG'
-            if PIL:
-                # convert Qt image to PIL image
-                buf = QtCore.QBuffer()
-                buf.open(QtCore.QIODevice.WriteOnly)
-                qt_im.save(buf, 'PPM')
-                data = BytesIO(buf.data().data())
-                pil_im = PIL.open(data)
-                # scale PIL image
-                pil_im = pil_im.resize((w, h), PIL.ANTIALIAS)
-                # save image to memory
-                data = BytesIO()
-                pil_im.save(data, fmt)
-                data = data.getvalue()
-            else:
-                # scale Qt image - not as good quality as PIL
-                qt_im = qt_im.scaled(
-                    w, h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
-                # save image to memory
-                buf = QtCore.QBuffer()
-                buf.open(QtCore.QIODevice.WriteOnly)
-                qt_im.save(buf, fmt)
-                data = buf.data().data()
-            # set thumbnail
-            self.metadata.thumbnail = data, fmt, w, h
-            # reload thumbnail
-            self.load_thumbnail()
+        if self.selected:
+            images = self.image_list.get_selected_images()
+        else:
+            images = [self]
+        self.image_list.regenerate_thumbnails(images)
 
     @catch_all
     def contextMenuEvent(self, event):
-        menu = QtWidgets.QMenu(self)
+        if not self.metadata:
+            # still loading
+            return
+        menu = QtWidgets.QMenu(self.image_list)
         menu.addAction(self.tr('Reload metadata'), self.reload_metadata)
         menu.addAction(self.tr('Save metadata'), self.save_metadata)
         menu.addAction(self.tr('View changes'), self.diff_metadata)
         menu.addAction(self.tr('Regenerate thumbnail'), self.regenerate_thumbnail)
         action = menu.exec_(event.globalPos())
 
+    @QtCore.pyqtSlot(bool)
+    @catch_all
+    def show_status(self, changed, name=None):
+        if name:
+            self.image_list.summary.update(self, name)
+        status = ''
+        # set 'geotagged' status
+        if self.metadata.latlong:
+            status += six.unichr(0x2690)
+        # set 'unsaved' status
+        if changed:
+            status += six.unichr(0x26A1)
+        self.status = status
+        self.image_list.model.image_changed(self)
+        if changed:
+            self.image_list.new_metadata.emit(True)
+
+    def set_thumb_size(self, thumb_size):
+        self.thumb_size = thumb_size
+
+    def load_thumbnail(self):
+        # pixmap is fetched from the cache when the thumbnail is drawn
+        self.image_list.model.image_changed(self)
+
+    def get_pixmap(self):
+        if not self.metadata:
+            return None
+        return self.image_list.pixmap_cache.get(self, self.thumb_size)
+
+    def get_placeholder(self):
+        # text to show instead of a thumbnail
+        if not self.metadata:
+            return self.tr('Loading')
+        return self.tr('No\nthumbnail\nin file')
+
+    def date_key(self):
+        # the key is only recomputed if a date has changed (changing a
+        # Metadata value replaces it, so an identity test is sufficient)
+        md = self.metadata
+        dates = (md.date_taken, md.date_digitised, md.date_modified)
+        if self._key_dates and all(
+                x is y for (x, y) in zip(dates, self._key_dates)):
+            return self._date_key
+        for date in dates:
+            if date is not None:
+                result = date.datetime
+                break
+        else:
+            # use file date as last resort
+            result = datetime.fromtimestamp(self.file_times[1])
+        # append path so photos with same time stamp get sorted
+        # consistently
+        self._date_key = result, self.path
+        self._key_dates = dates
+        return self._date_key
+
+    def set_selected(self, value):
+        if value == self.selected:
+            return
+        self.selected = value
+        self.image_list.selection.select(self, value)
+        self.image_list.model.image_changed(self)
+
+    def get_selected(self):
+        return self.selected
+
+
+class ImageCollection(object):
+    """The open images, kept in order of a sort key.
+
+    Images can be looked up by path, and their position found, without
+    searching the whole list. New images are inserted at the right
+    place, found by bisection of a list of their sort keys. The
+    position index is rebuilt (once) after anything other than an
+    append changes the positions.
+
+    """
+    def __init__(self, key=None):
+        self._key = key or (lambda x: x.path)
+        self._images = []
+        self._keys = []
+        self._paths = {}
+        self._positions = {}
+
+    def __len__(self):
+        return len(self._images)
+
+    def __iter__(self):
+        return iter(self._images)
+
+    def __getitem__(self, idx):
+        return self._images[idx]
+
+    def __contains__(self, image):
+        return self._paths.get(image.path) is image
+
+    def get(self, path):
+        return self._paths.get(path)
+
+    def index(self, image):
+        if self._positions is None:
+            self._positions = dict(
+                (image, idx) for (idx, image) in enumerate(self._images))
+        if image not in self._positions:
+            raise ValueError('image is not in collection')
+        return self._positions[image]
+
+    def add(self, image):
+        key = self._key(image)
+        idx = bisect.bisect_right(self._keys, key)
+        self._images.insert(idx, image)
+        self._keys.insert(idx, key)
+        self._paths[image.path] = image
+        if idx == len(self._images) - 1 and self._positions is not None:
+            self._positions[image] = idx
+        else:
+            self._positions = None
+        return idx
+
+    def remove(self, images):
+        images = set(images)
+        if not images:
+            return
+        keep = [i for (i, image) in enumerate(self._images)
+                if image not in images]
+        self._images = [self._images[i] for i in keep]
+        self._keys = [self._keys[i] for i in keep]
+        for image in images:
+            if self._paths.get(image.path) is image:
+                del self._paths[image.path]
+        self._positions = None
+
+    def sort(self, key=None):
+        """Sort the images, if they're not already in order.
+
+        Returns True if the order has changed.
+
+        """
+        if key:
+            self._key = key
+        keys = [self._key(x) for x in self._images]
+        if keys == self._keys:
+            return False
+        pairs = sorted(zip(keys, self._images), key=lambda x: x[0])
+        self._keys = [x[0] for x in pairs]
+        images = [x[1] for x in pairs]
+        if images == self._images:
+            return False
+        self._images = images
+        self._positions = None
+        return True
+
+
+class ImageSelection(object):
+    """The selected images, and the changes since they were last
+    reported to the editing tabs. The summary of the selected images'
+    metadata is kept in step.
+
+    """
+    def __init__(self, summary):
+        self.summary = summary
+        self.images = set()
+        self.added = set()
+        self.removed = set()
+        self._ordered = None
+
+    def __len__(self):
+        return len(self.images)
+
+    def __contains__(self, image):
+        return image in self.images
+
+    def select(self, image, value):
+        if value:
+            if image in self.images:
+                return
+            self.images.add(image)
+            self.summary.add(image)
+            if image in self.removed:
+                self.removed.remove(image)
+            else:
+                self.added.add(image)
+        else:
+            if image not in self.images:
+                return
+            self.images.remove(image)
+            self.summary.remove(image)
+            if image in self.added:
+                self.added.remove(image)
+            else:
+                self.removed.add(image)
+        self._ordered = None
+
+    def ordered(self, collection):
+        """Return the selected images in the order of collection."""
+        if self._ordered is None:
+            self._ordered = sorted(self.images, key=collection.index)
+        return self._ordered
+
+    def reorder(self):
+        self._ordered = None
+
+    def take_changes(self):
+        """Return (added, removed) since the last call."""
+        added, removed = self.added, self.removed
+        self.added = set()
+        self.removed = set()
+        return added, removed
+
+
+class ImageListModel(QtCore.QAbstractListModel):
+    """The images shown by ThumbnailView, in display order."""
+    def __init__(self, *arg, **kw):
+        super(ImageListModel, self).__init__(*arg, **kw)
+        self.images = []
+        self.rows = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.images)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        image = self.images[index.row()]
+        if role == Qt.DisplayRole:
+            return image.name
+        if role == Qt.ToolTipRole:
+            return image.path
+        return None
+
+    def image_at(self, index):
+        if not index.isValid():
+            return None
+        return self.images[index.row()]
+
+    def index_of(self, image):
+        if image not in self.rows:
+            return QtCore.QModelIndex()
+        return self.index(self.rows[image])
+
+    def add_image(self, image, row=None):
+        if image in self.rows:
+            return
+        if row is None:
+            row = len(self.images)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.images.insert(row, image)
+        for idx in range(row, len(self.images)):
+            self.rows[self.images[idx]] = idx
+        self.endInsertRows()
+
+    def move_image(self, image, row):
+        # move one row, e.g. a loaded image to its sorted position
+        old_row = self.rows[image]
+        if row == old_row:
+            return
+        dest = row
+        if row > old_row:
+            dest += 1
+        self.beginMoveRows(
+            QtCore.QModelIndex(), old_row, old_row, QtCore.QModelIndex(), dest)
+        del self.images[old_row]
+        self.images.insert(row, image)
+        for idx in range(min(row, old_row), max(row, old_row) + 1):
+            self.rows[self.images[idx]] = idx
+        self.endMoveRows()
+
+    def remove_image(self, image):
+        self.remove_images([image])
+
+    def remove_images(self, images):
+        rows = sorted(self.rows[x] for x in images if x in self.rows)
+        if not rows:
+            return
+        # remove runs of consecutive rows, last first
+        while rows:
+            last = rows.pop()
+            first = last
+            while rows and rows[-1] == first - 1:
+                first = rows.pop()
+            self.beginRemoveRows(QtCore.QModelIndex(), first, last)
+            del self.images[first:last + 1]
+            self.endRemoveRows()
+        self._set_rows()
+
+    def set_order(self, images):
+        # rearrange existing rows, without resetting the view
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_images = [self.image_at(x) for x in old_indexes]
+        self.images = list(images)
+        self._set_rows()
+        self.changePersistentIndexList(
+            old_indexes, [self.index_of(x) for x in old_images])
+        self.layoutChanged.emit()
+
+    def image_changed(self, image):
+        if image in self.rows:
+            index = self.index(self.rows[image])
+            self.dataChanged.emit(index, index)
+
+    def size_changed(self):
+        self.layoutAboutToBeChanged.emit()
+        self.layoutChanged.emit()
+
+    def _set_rows(self):
+        self.rows = dict((image, row) for (row, image) in enumerate(self.images))
+
+
+class ThumbnailDelegate(QtWidgets.QStyledItemDelegate):
+    """Draw an image's thumbnail, with its file name and status below
+    and a border showing if it's selected.
+
+    """
+    margin = 5
+
+    def __init__(self, image_list, *arg, **kw):
+        super(ThumbnailDelegate, self).__init__(*arg, **kw)
+        self.image_list = image_list
+        # get fonts the same way as for the labels they replace
+        label = QtWidgets.QLabel()
+        scale_font(label, 80)
+        self.name_font = label.font()
+        set_symbol_font(label)
+        scale_font(label, 80)
+        self.status_font = label.font()
+        self.text_height = max(
+            QtGui.QFontMetrics(self.name_font).height(),
+            QtGui.QFontMetrics(self.status_font).height())
+
+    def sizeHint(self, option, index):
+        size = self.image_list.thumb_size + (self.margin * 2)
+        return QtCore.QSize(size, size + self.text_height)
+
+    def paint(self, painter, option, index):
+        image = index.model().image_at(index)
+        if not image:
+            return
+        painter.save()
+        rect = option.rect
+        # border
+        pen = QtGui.QPen(QtGui.QColor((Qt.gray, Qt.red)[image.selected]))
+        pen.setWidth(2)
+        painter.setPen(pen)
+        painter.drawRect(rect.adjusted(1, 1, -1, -1))
+        # thumbnail, or placeholder text
+        size = image.thumb_size
+        thumb_rect = QtCore.QRect(rect.left() + self.margin,
+                                  rect.top() + self.margin, size, size)
+        pixmap = image.get_pixmap()
+        painter.setPen(option.palette.color(QtGui.QPalette.Text))
+        if pixmap:
+            x = thumb_rect.left() + ((size - pixmap.width()) // 2)
+            y = thumb_rect.top() + ((size - pixmap.height()) // 2)
+            painter.drawPixmap(x, y, pixmap)
+        else:
+            painter.setFont(option.font)
+            painter.drawText(thumb_rect, Qt.AlignCenter, image.get_placeholder())
+        # status and file name
+        text_rect = QtCore.QRect(
+            thumb_rect.left(), thumb_rect.bottom() + 1, size, self.text_height)
+        painter.setFont(self.status_font)
+        status_rect = painter.boundingRect(
+            text_rect, Qt.AlignLeft | Qt.AlignVCenter, image.status)
+        painter.drawText(text_rect, Qt.AlignLeft | Qt.AlignVCenter, image.status)
+        if image.status:
+            text_rect.setLeft(status_rect.right() + 1)
+        painter.setFont(self.name_font)
+        name = QtGui.QFontMetrics(self.name_font).elidedText(
+            image.name, Qt.ElideLeft, text_rect.width())
+        painter.drawText(text_rect, Qt.AlignRight | Qt.AlignVCenter, name)
+        painter.restore()
+
+
+class ThumbnailView(QtWidgets.QListView):
+    """Multi-row fixed-width or single-row variable-width grid of
+    thumbnails, according to height. Only the visible thumbnails are
+    drawn, so very large numbers of images can be shown.
+
+    Selection is stored in each Image and managed by ImageList, not by
+    the view's selection model.
+
+    When scrolling stops, thumbnails within prefetch_pages pages of the
+    visible area are decoded, ready to be shown, and pixmaps more than
+    retain_pages pages away are released.
+
+    """
+    dropped_images = QtCore.pyqtSignal(list)
+    prefetch_pages = 1
+    retain_pages = 4
+
+    def __init__(self, image_list, *arg, **kw):
+        super(ThumbnailView, self).__init__(*arg, **kw)
+        self.image_list = image_list
+        self.pressed_image = None
+        self.drag_start_pos = None
+        self.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.setFlow(QtWidgets.QListView.LeftToRight)
+        self.setMovement(QtWidgets.QListView.Static)
+        self.setResizeMode(QtWidgets.QListView.Adjust)
+        self.setUniformItemSizes(True)
+        self.setSpacing(0)
+        self.setAcceptDrops(True)
+        self.multi_row = None
+        self.set_multi_row(True)
+        self.prefetch_timer = QtCore.QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(150)
+        self.prefetch_timer.timeout.connect(self.prefetch)
+        self.horizontalScrollBar().valueChanged.connect(self.schedule_prefetch)
+        self.verticalScrollBar().valueChanged.connect(self.schedule_prefetch)
+
+    def setModel(self, model):
+        super(ThumbnailView, self).setModel(model)
+        model.rowsInserted.connect(self.schedule_prefetch)
+        model.rowsRemoved.connect(self.schedule_prefetch)
+        model.modelReset.connect(self.schedule_prefetch)
+        model.layoutChanged.connect(self.schedule_prefetch)
+        model.dataChanged.connect(self.schedule_prefetch)
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def schedule_prefetch(self):
+        self.prefetch_timer.start()
+
+    def visible_rows(self):
+        # return range of rows in (or partly in) the viewport
+        count = self.model().rowCount()
+        if not count:
+            return 0, 0
+        first = self.indexAt(QtCore.QPoint(1, 1)).row()
+        if first < 0:
+            first = 0
+        item_size = self.itemDelegate().sizeHint(None, None)
+        viewport = self.viewport().size()
+        columns = max(viewport.width() // item_size.width(), 1) + 1
+        rows = max(viewport.height() // item_size.height(), 1) + 1
+        if self.multi_row:
+            return first, min(first + (columns * rows), count)
+        return first, min(first + columns, count)
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def prefetch(self):
+        images = self.model().images
+        first, last = self.visible_rows()
+        page = last - first
+        for image in images[max(first - (page * self.prefetch_pages), 0):
+                            last + (page * self.prefetch_pages)]:
+            if image.metadata:
+                image.get_pixmap()
+        retain = set(x.path for x in images[
+            max(first - (page * self.retain_pages), 0):
+            last + (page * self.retain_pages)])
+        self.image_list.pixmap_cache.retain(retain)
+
+    def image_at(self, pos):
+        return self.model().image_at(self.indexAt(pos))
+
+    def set_multi_row(self, multi_row):
+        if multi_row:
+            self.setMinimumHeight(0)
+        else:
+            delegate = self.itemDelegate()
+            height = delegate.sizeHint(None, None).height()
+            self.setMinimumHeight(
+                height + self.horizontalScrollBar().sizeHint().height() +
+                (self.frameWidth() * 2))
+        if multi_row == self.multi_row:
+            return
+        self.multi_row = multi_row
+        self.setWrapping(multi_row)
+        if multi_row:
+            self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+            self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        else:
+            self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+            self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+
+    def update_layout(self):
+        # call after changing the thumbnail size
+        self.set_multi_row(self.multi_row)
+        self.model().size_changed()
+
+    def ensure_visible(self, image):
+        index = self.model().index_of(image)
+        if index.isValid():
+            self.scrollTo(index)
+
+    @catch_all
+    def resizeEvent(self, event):
+        super(ThumbnailView, self).resizeEvent(event)
+        self.schedule_prefetch()
+        # compare height available with a horizontal scroll bar to the
+        # thumbnail height
+        height = (event.size().height() - (self.frameWidth() * 2) -
+                  self.horizontalScrollBar().sizeHint().height())
+        item_h = self.itemDelegate().sizeHint(None, None).height()
+        self.set_multi_row(height > item_h)
+
     @catch_all
     def mousePressEvent(self, event):
+        image = self.image_at(event.pos())
+        self.pressed_image = image
+        if not image:
+            self.image_list.select_none()
+            return
+        if not image.metadata:
+            return
         if event.button() == Qt.LeftButton:
             self.drag_start_pos = event.pos()
         if event.modifiers() == Qt.ControlModifier:
-            self.image_list.select_image(self, multiple_selection=True)
+            self.image_list.select_image(image, multiple_selection=True)
         elif event.modifiers() == Qt.ShiftModifier:
-            self.image_list.select_image(self, extend_selection=True)
-        elif not self.get_selected():
+            self.image_list.select_image(image, extend_selection=True)
+        elif not image.get_selected():
             # don't clear selection in case we're about to drag
-            self.image_list.select_image(self)
+            self.image_list.select_image(image)
 
     @catch_all
     def mouseReleaseEvent(self, event):
+        image = self.pressed_image
+        self.pressed_image = None
+        self.drag_start_pos = None
+        if not (image and image.metadata):
+            return
         if event.modifiers() not in (Qt.ControlModifier, Qt.ShiftModifier):
             # clear any multiple selection
-            self.image_list.select_image(self)
+            self.image_list.select_image(image)
 
     @catch_all
     def mouseMoveEvent(self, event):
-        if not self.image_list.drag_icon:
+        image = self.pressed_image
+        if not (image and image.metadata and self.drag_start_pos and
+                self.image_list.drag_icon):
             return
         if ((event.pos() - self.drag_start_pos).manhattanLength() <
                                     QtWidgets.QApplication.startDragDistance()):
@@ -365,6 +1039,7 @@ class Image(QtWidgets.QFrame):
             paths.append(image.path)
         if not paths:
             return
+        self.pressed_image = None
         drag = QtGui.QDrag(self)
         # construct icon
         count = min(len(paths), 8)
@@ -394,100 +1069,15 @@ class Image(QtWidgets.QFrame):
 
     @catch_all
     def mouseDoubleClickEvent(self, event):
-        webbrowser.open(self.path)
+        image = self.image_at(event.pos())
+        if image:
+            webbrowser.open(image.path)
 
-    @QtCore.pyqtSlot(bool)
     @catch_all
-    def show_status(self, changed):
-        status = ''
-        # set 'geotagged' status
-        if self.metadata.latlong:
-            status += six.unichr(0x2690)
-        # set 'unsaved' status
-        if changed:
-            status += six.unichr(0x26A1)
-        self.status.setText(status)
-        self._elide_name()
-        if changed:
-            self.image_list.new_metadata.emit(True)
-
-    def _elide_name(self):
-        self.status.adjustSize()
-        elided_name = self.label.fontMetrics().elidedText(
-            self.name, Qt.ElideLeft, self.thumb_size - self.status.width())
-        self.label.setText(elided_name)
-
-    def _set_thumb_size(self, thumb_size):
-        self.thumb_size = thumb_size
-        self.image.setFixedSize(self.thumb_size, self.thumb_size)
-        self._elide_name()
-
-    def set_thumb_size(self, thumb_size):
-        self._set_thumb_size(thumb_size)
-        self.load_thumbnail()
-
-    def load_thumbnail(self):
-        pixmap = QtGui.QPixmap()
-        thumb = self.metadata.thumbnail
-        if thumb:
-            pixmap.loadFromData(thumb.data)
-        if pixmap.isNull():
-            self.image.setText(self.tr('No\nthumbnail\nin file'))
-            return
-        pixmap = self.transform(pixmap, self.metadata.orientation)
-        self.image.setPixmap(
-            pixmap.scaled(self.thumb_size, self.thumb_size,
-                          Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
-    def set_selected(self, value):
-        self.selected = value
-        if self.selected:
-            self.setStyleSheet("#thumbnail {border: 2px solid red}")
-        else:
-            self.setStyleSheet("#thumbnail {border: 2px solid grey}")
-
-    def get_selected(self):
-        return self.selected
-
-
-class ScrollArea(QtWidgets.QScrollArea):
-    dropped_images = QtCore.pyqtSignal(list)
-
-    def __init__(self, parent=None):
-        super(ScrollArea, self).__init__(parent)
-        self.multi_row = None
-        self.set_multi_row(True)
-        self.setWidgetResizable(True)
-        self.setAcceptDrops(True)
-        widget = QtWidgets.QWidget()
-        self.thumbs = ThumbsLayout(scroll_area=self)
-        widget.setLayout(self.thumbs)
-        self.setWidget(widget)
-        # adopt some layout methods
-        self.add_widget = self.thumbs.addWidget
-        self.remove_widget = self.thumbs.removeWidget
-
-    def set_multi_row(self, multi_row):
-        if multi_row:
-            self.setMinimumHeight(0)
-        else:
-            scrollbar = self.horizontalScrollBar()
-            self.setMinimumHeight(
-                self.thumbs.sizeHint().height() + scrollbar.height())
-        if multi_row == self.multi_row:
-            return
-        self.multi_row = multi_row
-        if multi_row:
-            self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-            self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-        else:
-            self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
-            self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-
-    def ensureWidgetVisible(self, widget):
-        left, top, right, bottom = self.thumbs.getContentsMargins()
-        super(ScrollArea, self).ensureWidgetVisible(
-            widget, max(left, right), max(top, bottom))
+    def contextMenuEvent(self, event):
+        image = self.image_at(event.pos())
+        if image:
+            image.contextMenuEvent(event)
 
     @catch_all
     def dropEvent(self, event):
@@ -503,114 +1093,76 @@ class ScrollArea(QtWidgets.QScrollArea):
             event.acceptProposedAction()
 
     @catch_all
-    def resizeEvent(self, event):
-        super(ScrollArea, self).resizeEvent(event)
-        width = event.size().width()
-        height = event.size().height()
-        if not self.multi_row:
-            scrollbar = self.verticalScrollBar()
-            width -= scrollbar.width()
-        scrollbar = self.horizontalScrollBar()
-        if not scrollbar.isVisible():
-            height -= scrollbar.height()
-        self.thumbs.set_viewport_size(QtCore.QSize(width, height))
-
-
-class ThumbsLayout(QtWidgets.QLayout):
-    """Multi-row fixed-width or single-row variable-width grid of
-    thumbnail widgets, according to height.
-
-    """
-    def __init__(self, scroll_area=None, **kw):
-        super(ThumbsLayout, self).__init__(**kw)
-        self.scroll_area = scroll_area
-        self.item_list = []
-        self.viewport_size = QtCore.QSize()
-        self._do_layout(QtCore.QPoint(0, 0))
-
-    def addItem(self, item):
-        self.item_list.append(item)
-
-    def horizontalSpacing(self):
-        return 0
-
-    def verticalSpacing(self):
-        return 0
-
-    def count(self):
-        return len(self.item_list)
-
-    def itemAt(self, idx):
-        if idx < 0 or idx >= len(self.item_list):
-            return None
-        return self.item_list[idx]
-
-    def takeAt(self, idx):
-        if idx < 0 or idx >= len(self.item_list):
-            return None
-        return self.item_list.pop(idx)
-
-    def expandingDirections(self):
-        return 0
-
-    def hasHeightForWidth(self):
-        return False
-
-    def setGeometry(self, rect):
-        super(ThumbsLayout, self).setGeometry(rect)
-        self._do_layout(rect.topLeft())
-
-    def sizeHint(self):
-        return self.size_hint
-
-    def minimumSize(self):
-        return self.size_hint
-
-    def set_viewport_size(self, size):
-        self.viewport_size = size
-        self._do_layout(QtCore.QPoint(0, 0))
-
-    def _do_layout(self, origin):
-        left, top, right, bottom = self.getContentsMargins()
-        width_hint = left + right
-        height_hint = top + bottom
-        if self.item_list:
-            item_size = self.item_list[0].sizeHint()
-            item_h = item_size.height()
-            item_w = item_size.width()
-            multi_row = self.viewport_size.height() - height_hint > item_h
-            if multi_row:
-                columns = max(
-                    (self.viewport_size.width() - width_hint) // item_w, 1)
-                rows = (len(self.item_list) + columns - 1) // columns
-            else:
-                columns = len(self.item_list)
-                rows = 1
-            width_hint += columns * item_w
-            height_hint += rows * item_h
-        self.size_hint = QtCore.QSize(width_hint, height_hint)
-        if not self.item_list:
-            return
-        x = origin.x() + left
-        y = origin.y() + top
-        for n, item in enumerate(self.item_list):
-            i, j = n % columns, n // columns
-            item.setGeometry(QtCore.QRect(
-                QtCore.QPoint(x + (i * item_w), y + (j * item_h)), item_size))
-        self.scroll_area.set_multi_row(multi_row)
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasFormat('text/uri-list'):
+            event.acceptProposedAction()
 
 
 class ImageList(QtWidgets.QWidget):
     image_list_changed = QtCore.pyqtSignal()
     new_metadata = QtCore.pyqtSignal(bool)
     selection_changed = QtCore.pyqtSignal(list)
+    selection_delta = QtCore.pyqtSignal(list, list, list)
     sort_order_changed = QtCore.pyqtSignal()
 
     def __init__(self, parent=None):
         super(ImageList, self).__init__(parent)
         self.app = QtWidgets.QApplication.instance()
         self.drag_icon = None
-        self.images = []
+        self.images = ImageCollection()
+        # distinct metadata values of the selected images, shared by
+        # the editing tabs
+        self.summary = SelectionSummary()
+        self.selection = ImageSelection(self.summary)
+        # selection changes are sent to the editing tabs after a short
+        # delay, so holding down an arrow key doesn't refresh the tabs
+        # for every image passed over
+        self.selection_timer = QtCore.QTimer(self)
+        self.selection_timer.setSingleShot(True)
+        self.selection_timer.setInterval(30)
+        self.selection_timer.timeout.connect(self.send_selection_delta)
+        # images whose metadata is being read by worker threads
+        self.loading = {}
+        # scroll to the first loaded image, but not after that
+        self.scroll_to_loaded = False
+        self.loader = WorkerPool(Metadata.read_file, parent=self)
+        self.loader.batch_done.connect(self.files_loaded)
+        self.loader.finished.connect(self.loading_finished)
+        # saved files whose contents are checked in the background
+        self.verifier = WorkerPool(
+            lambda job: Metadata.verify_file(*job), max_threads=1, parent=self)
+        self.verifier.batch_done.connect(self.files_verified)
+        # images whose metadata is being saved by worker threads
+        self.saving = set()
+        self.save_errors = []
+        self.verify_jobs = []
+        self.saver = WorkerPool(
+            lambda job: job[0].metadata.write_files(job[1], **job[2]),
+            parent=self)
+        self.saver.batch_done.connect(self.files_saved)
+        self.saver.finished.connect(self.saving_finished)
+        self.thumbnailer = WorkerPool(
+            lambda job: make_thumbnail(*job[1:]), parent=self)
+        self.thumbnailer.batch_done.connect(self.thumbnails_made)
+        self.poster_maker = WorkerPool(
+            lambda image: make_poster(image.path), parent=self)
+        self.poster_maker.batch_done.connect(self.posters_made)
+        # directories of open files are watched for changes made by
+        # other programs, watching every file could use up the
+        # system's limit on watches
+        self.watcher = QtCore.QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.directory_changed)
+        self.watched_dirs = {}
+        self.changed_images = set()
+        self.change_timer = QtCore.QTimer(self)
+        self.change_timer.setSingleShot(True)
+        self.change_timer.setInterval(500)
+        self.change_timer.timeout.connect(self.check_changed_files)
+        self.reloader = WorkerPool(reload_file, parent=self)
+        self.reloader.batch_done.connect(self.files_reloaded)
+        # thumbnail pixmaps, memory use is limited to a number of MB
+        self.pixmap_cache = PixmapCache(1024 * 1024 * int(
+            self.app.config_store.get('controls', 'pixmap_cache', '128')))
         self.last_selected = None
         self.selection_anchor = None
         self.thumb_size = int(
@@ -622,23 +1174,26 @@ class ImageList(QtWidgets.QWidget):
         self.setLayout(layout)
         layout.setContentsMargins(0, 0, 0, 0)
         # thumbnail display
-        self.scroll_area = ScrollArea()
-        self.scroll_area.dropped_images.connect(self.open_file_list)
-        layout.addWidget(self.scroll_area, 0, 0, 1, 6)
+        self.model = ImageListModel(self)
+        self.thumb_view = ThumbnailView(self)
+        self.thumb_view.setItemDelegate(ThumbnailDelegate(self, self.thumb_view))
+        self.thumb_view.setModel(self.model)
+        self.thumb_view.dropped_images.connect(self.open_file_list)
+        layout.addWidget(self.thumb_view, 0, 0, 1, 6)
         QtWidgets.QShortcut(QtGui.QKeySequence.MoveToPreviousChar,
-                        self.scroll_area, self.move_to_prev_thumb)
+                        self.thumb_view, self.move_to_prev_thumb)
         QtWidgets.QShortcut(QtGui.QKeySequence.MoveToNextChar,
-                        self.scroll_area, self.move_to_next_thumb)
+                        self.thumb_view, self.move_to_next_thumb)
         QtWidgets.QShortcut(QtGui.QKeySequence.MoveToStartOfLine,
-                        self.scroll_area, self.move_to_first_thumb)
+                        self.thumb_view, self.move_to_first_thumb)
         QtWidgets.QShortcut(QtGui.QKeySequence.MoveToEndOfLine,
-                        self.scroll_area, self.move_to_last_thumb)
+                        self.thumb_view, self.move_to_last_thumb)
         QtWidgets.QShortcut(QtGui.QKeySequence.SelectPreviousChar,
-                        self.scroll_area, self.select_prev_thumb)
+                        self.thumb_view, self.select_prev_thumb)
         QtWidgets.QShortcut(QtGui.QKeySequence.SelectNextChar,
-                        self.scroll_area, self.select_next_thumb)
+                        self.thumb_view, self.select_next_thumb)
         QtWidgets.QShortcut(QtGui.QKeySequence.SelectAll,
-                        self.scroll_area, self.select_all)
+                        self.thumb_view, self.select_all)
         # sort key selector
         layout.addWidget(QtWidgets.QLabel(self.tr('sort by: ')), 1, 0)
         self.sort_name = QtWidgets.QRadioButton(self.tr('file name'))
@@ -651,6 +1206,10 @@ class ImageList(QtWidgets.QWidget):
             self.sort_date.setChecked(True)
         else:
             self.sort_name.setChecked(True)
+        self.images.sort(key=self._sort_key())
+        # progress of loading or saving files
+        self.progress = ProgressDisplay()
+        layout.addWidget(self.progress, 1, 3)
         # size selector
         layout.addWidget(QtWidgets.QLabel(self.tr('thumbnail size: ')), 1, 4)
         self.size_slider = QtWidgets.QSlider(Qt.Horizontal)
@@ -669,21 +1228,16 @@ class ImageList(QtWidgets.QWidget):
         self.drag_hotspot = hotspot
 
     def get_image(self, path):
-        for image in self.images:
-            if image.path == path:
-                return image
-        return None
+        return self.images.get(path)
 
     def get_images(self):
         return self.images
 
-    @catch_all
-    def mousePressEvent(self, event):
-        if self.scroll_area.underMouse():
-            self._clear_selection()
-            self.last_selected = None
-            self.selection_anchor = None
-            self.emit_selection()
+    def select_none(self):
+        self._clear_selection()
+        self.last_selected = None
+        self.selection_anchor = None
+        self.emit_selection_delta()
 
     @QtCore.pyqtSlot(bool)
     @catch_all
@@ -716,41 +1270,211 @@ class ImageList(QtWidgets.QWidget):
     @QtCore.pyqtSlot(list)
     @catch_all
     def open_file_list(self, path_list):
-        with Busy():
-            for path in path_list:
-                self.open_file(path)
-        self.done_opening(path_list[-1])
+        # show placeholders now, read metadata in worker threads
+        self.loader.finish_cancelled()
+        new_paths = []
+        for path in path_list:
+            path = os.path.abspath(path)
+            if not os.path.isfile(path):
+                continue
+            if path in self.loading or self.get_image(path):
+                # already opened this path
+                continue
+            image = Image(path, self, thumb_size=self.thumb_size)
+            self.loading[path] = image
+            self.model.add_image(image)
+            new_paths.append(path)
+        if not new_paths:
+            return
+        self.app.config_store.set(
+            'paths', 'images', os.path.dirname(new_paths[-1]))
+        if not self.loader.is_running():
+            self.scroll_to_loaded = True
+        self.loader.start(new_paths)
+        self.progress.start(self.tr('Loading'), self.loader)
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def files_loaded(self, batch):
+        image = None
+        failed = []
+        for path, result, error in batch:
+            image = self.loading.pop(path)
+            if error:
+                failed.append(image)
+                image = None
+                continue
+            handlers, values = result
+            image.set_metadata(Metadata(path, handlers=handlers, values=values))
+            # move placeholder to its sorted position, loaded images
+            # are ahead of any placeholders still loading
+            self.model.move_image(image, self.images.add(image))
+            self._make_poster(image)
+        self.model.remove_images(failed)
+        self._watch([self.get_image(path) for (path, result, error) in batch
+                     if not error])
+        for path, result, error in batch:
+            if not error:
+                self.get_image(path).load_thumbnail()
+        if image and self.scroll_to_loaded:
+            # don't keep moving the view while the user scrolls it
+            self.scroll_to_loaded = False
+            self.thumb_view.ensure_visible(image)
+
+    @QtCore.pyqtSlot(bool)
+    @catch_all
+    def loading_finished(self, completed):
+        # remove placeholders of any files not loaded
+        self.model.remove_images(list(self.loading.values()))
+        self.loading = {}
+        self._opening_finished()
 
     def open_file(self, path):
         path = os.path.abspath(path)
         if not os.path.isfile(path):
             return
-        if self.get_image(path):
+        if path in self.loading or self.get_image(path):
             # already opened this path
             return
         image = Image(path, self, thumb_size=self.thumb_size)
-        self.images.append(image)
-        self.show_thumbnail(image)
+        image.set_metadata(Metadata(path))
+        self.show_thumbnail(image, row=self.images.add(image))
+        self._watch([image])
+        self._make_poster(image)
+
+    def _watch(self, images):
+        paths = []
+        for image in images:
+            dir_name = os.path.dirname(image.path)
+            if dir_name not in self.watched_dirs:
+                self.watched_dirs[dir_name] = set()
+                paths.append(dir_name)
+            self.watched_dirs[dir_name].add(image)
+        if paths:
+            self.watcher.addPaths(paths)
+
+    def _unwatch(self, images):
+        paths = []
+        for image in images:
+            dir_name = os.path.dirname(image.path)
+            if dir_name in self.watched_dirs:
+                self.watched_dirs[dir_name].discard(image)
+                if not self.watched_dirs[dir_name]:
+                    del self.watched_dirs[dir_name]
+                    paths.append(dir_name)
+        if paths:
+            self.watcher.removePaths(paths)
+        self.changed_images.difference_update(images)
+
+    @QtCore.pyqtSlot(six.text_type)
+    @catch_all
+    def directory_changed(self, path):
+        # a file may have been replaced, or a sidecar created or deleted
+        if path in self.watched_dirs:
+            self.changed_images.update(self.watched_dirs[path])
+            self.change_timer.start()
+
+    @catch_all
+    def changeEvent(self, event):
+        # files modified in place don't change their directory, so
+        # check every file when the user returns from another program
+        if (event.type() == QtCore.QEvent.ActivationChange and
+                self.isActiveWindow() and self.images):
+            self.changed_images.update(self.images)
+            self.change_timer.start()
+        super(ImageList, self).changeEvent(event)
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def check_changed_files(self):
+        # files are checked in worker threads, as there may be many of
+        # them on a slow network drive, and not while Photini is saving
+        # them
+        changed, self.changed_images = self.changed_images, set()
+        items = []
+        for image in changed:
+            if image not in self.images:
+                continue
+            if image in self.saving:
+                # check again after saving has finished
+                self.changed_images.add(image)
+                self.change_timer.start()
+                continue
+            items.append((image.path, image.file_stamp))
+        if items:
+            self.reloader.start(items)
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def files_reloaded(self, batch):
+        selected = []
+        markers_changed = False
+        for (path, file_stamp), result, error in batch:
+            image = self.get_image(path)
+            if error or not result or not image:
+                continue
+            if image in self.saving:
+                # check again after saving has finished
+                self.changed_images.add(image)
+                self.change_timer.start()
+                continue
+            handlers, values = result
+            metadata = Metadata(path, handlers=handlers, values=values)
+            old_metadata = image.metadata
+            if old_metadata.changed():
+                if not old_metadata.edited:
+                    logger.warning('%s: not reloaded, has unsaved changes',
+                                   os.path.basename(path))
+                    continue
+                # keep unsaved edits
+                for name in old_metadata.edited:
+                    setattr(metadata, name, getattr(old_metadata, name))
+            logger.info('%s: reloaded', os.path.basename(path))
+            old_latlong = old_metadata.latlong
+            image.set_metadata(metadata)
+            image.load_thumbnail()
+            # keep image in sorted order, its date may have changed
+            self.images.remove([image])
+            self.model.move_image(image, self.images.add(image))
+            self.selection.reorder()
+            if metadata.latlong != old_latlong:
+                markers_changed = True
+            if image.selected:
+                selected.append(image)
+        if markers_changed:
+            # redraw map markers
+            self.image_list_changed.emit()
+        if selected:
+            # refresh the tabs' display of the reloaded images only
+            self.selection_delta.emit(
+                selected, selected, self.get_selected_images())
+
+    def _make_poster(self, image):
+        if image.file_type.startswith('video') and not image.metadata.thumbnail:
+            self.poster_maker.start([image])
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def posters_made(self, batch):
+        for image, result, error in batch:
+            if result and image in self.images:
+                image.poster = Thumbnail(result)
+                image.load_thumbnail()
 
     def done_opening(self, path):
         self.app.config_store.set('paths', 'images', os.path.dirname(path))
-        self._sort_thumbnails()
-
-    def _date_key(self, image):
-        result = image.metadata.date_taken
-        if result is None:
-            result = image.metadata.date_digitised
-        if result is None:
-            result = image.metadata.date_modified
-        if result is None:
-            # use file date as last resort
-            result = datetime.fromtimestamp(os.path.getmtime(image.path))
-        else:
-            result = result.datetime
-        # convert result to string and append path so photos with same
-        # time stamp get sorted consistently
-        result = result.strftime('%Y%m%d%H%M%S%f') + image.path
-        return result
+        self._opening_finished()
+
+    def _opening_finished(self):
+        # new images have already been inserted in order, but existing
+        # images may need to move if their dates have been edited
+        if self.images.sort():
+            self.selection.reorder()
+            self.model.set_order(list(self.images) + [
+                x for x in self.model.images if x.path in self.loading])
+        if self.last_selected:
+            self.thumb_view.ensure_visible(self.last_selected)
+        self.image_list_changed.emit()
 
     @QtCore.pyqtSlot()
     @catch_all
@@ -758,29 +1482,28 @@ class ImageList(QtWidgets.QWidget):
         self._sort_thumbnails()
         self.sort_order_changed.emit()
 
+    def _sort_key(self):
+        if self.sort_date.isChecked():
+            return lambda x: x.date_key()
+        return lambda x: x.path
+
     def _sort_thumbnails(self):
         sort_date = self.sort_date.isChecked()
         self.app.config_store.set('controls', 'sort_date', str(sort_date))
         with Busy():
-            if sort_date:
-                self.images.sort(key=self._date_key)
-            else:
-                self.images.sort(key=lambda x: x.path)
-            for image in self.images:
-                self.show_thumbnail(image, False)
+            self.images.sort(key=self._sort_key())
+            self.selection.reorder()
+            # any images still loading stay at the end
+            self.model.set_order(list(self.images) + [
+                x for x in self.model.images if x.path in self.loading])
         if self.last_selected:
-            self.app.processEvents()
-            self.scroll_area.ensureWidgetVisible(self.last_selected)
+            self.thumb_view.ensure_visible(self.last_selected)
         self.image_list_changed.emit()
 
-    def show_thumbnail(self, image, live=True):
-        self.scroll_area.add_widget(image)
-        if live:
-            self.app.processEvents()
-        image.load_thumbnail()
+    def show_thumbnail(self, image, row=None, live=True):
+        self.model.add_image(image, row=row)
         if live:
-            self.app.processEvents()
-            self.scroll_area.ensureWidgetVisible(image)
+            self.thumb_view.ensure_visible(image)
             self.app.processEvents()
 
     def close_files(self, all_files):
@@ -794,15 +1517,17 @@ class ImageList(QtWidgets.QWidget):
             return
         idx = self.images.index(close_list[0])
         for image in close_list:
-            self.images.remove(image)
-            self.scroll_area.remove_widget(image)
-            image.setParent(None)
+            image.set_selected(False)
+            self.pixmap_cache.discard(image.path)
+        self.images.remove(close_list)
+        self.model.remove_images(close_list)
+        self._unwatch(close_list)
         if 0 <= idx < len(self.images):
             self.select_image(self.images[idx])
         else:
             self.last_selected = None
             self.selection_anchor = None
-            self.emit_selection()
+            self.emit_selection_delta()
         self.image_list_changed.emit()
 
     @QtCore.pyqtSlot(bool)
@@ -817,17 +1542,64 @@ class ImageList(QtWidgets.QWidget):
             self.app.config_store.get('files', 'force_iptc', 'False'))
         keep_time = eval(
             self.app.config_store.get('files', 'preserve_timestamps', 'False'))
+        verify = self.app.config_store.get('files', 'verify', 'tags')
+        defer_verify = eval(
+            self.app.config_store.get('files', 'verify_deferred', 'False'))
         if not images:
             images = self.images
-        with Busy():
-            for image in images:
-                if keep_time:
-                    file_times = image.file_times
-                else:
-                    file_times = None
-                image.metadata.save(
-                    if_mode=if_mode, sc_mode=sc_mode,
-                    force_iptc=force_iptc, file_times=file_times)
+        self.saver.finish_cancelled()
+        jobs = []
+        for image in images:
+            if image in self.saving or not image.metadata.changed():
+                continue
+            if keep_time:
+                file_times = image.file_times
+            else:
+                file_times = None
+            options = {'if_mode': if_mode, 'sc_mode': sc_mode,
+                       'force_iptc': force_iptc, 'file_times': file_times,
+                       'verify': verify, 'defer_verify': defer_verify}
+            jobs.append((image, image.metadata.get_values(), options))
+            self.saving.add(image)
+        if not jobs:
+            return
+        self.saver.start(jobs)
+        self.progress.start(self.tr('Saving'), self.saver)
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def files_saved(self, batch):
+        for (image, values, options), result, error in batch:
+            self.saving.discard(image)
+            error = result or error
+            image.metadata.save_finished(values, error)
+            if image in self.images:
+                # don't mistake our own changes for another program's
+                image.file_stamp = Metadata.file_stamp(image.path)
+            if error:
+                self.save_errors.append('{}: {}'.format(
+                    os.path.basename(image.path), error))
+            elif image.metadata.pending_verify:
+                self.verify_jobs.append(
+                    (image.path,) + image.metadata.pending_verify)
+                image.metadata.pending_verify = None
+
+    @QtCore.pyqtSlot(bool)
+    @catch_all
+    def saving_finished(self, completed):
+        # images not saved if saving was cancelled
+        self.saving = set()
+        if self.verify_jobs:
+            self.verifier.start(self.verify_jobs)
+            self.verify_jobs = []
+        if self.save_errors:
+            dialog = QtWidgets.QMessageBox(self)
+            dialog.setWindowTitle(self.tr('Photini: save error'))
+            dialog.setText(self.tr('<h3>Some files could not be saved.</h3>'))
+            dialog.setDetailedText('\n'.join(self.save_errors))
+            dialog.setIcon(QtWidgets.QMessageBox.Warning)
+            self.save_errors = []
+            dialog.exec_()
         unsaved = False
         for image in self.images:
             if image.metadata.changed():
@@ -835,6 +1607,51 @@ class ImageList(QtWidgets.QWidget):
                 break
         self.new_metadata.emit(unsaved)
 
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def files_verified(self, batch):
+        unsaved = False
+        for job, missing, error in batch:
+            path = job[0]
+            if error:
+                missing = [error]
+            if not missing:
+                continue
+            for name in missing:
+                logger.warning(
+                    '%s: not saved: %s', os.path.basename(path), name)
+            image = self.get_image(path)
+            if image:
+                image.metadata.set_unsaved()
+                unsaved = True
+        if unsaved:
+            self.new_metadata.emit(True)
+
+    def regenerate_thumbnails(self, images):
+        jobs = []
+        for image in images:
+            if image.metadata:
+                jobs.append((image, image.path, image.file_type,
+                             image.metadata.orientation))
+        if not jobs:
+            return
+        self.thumbnailer.start(jobs)
+        self.progress.start(self.tr('Making thumbnails'), self.thumbnailer)
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def thumbnails_made(self, batch):
+        for (image, path, file_type, orientation), result, error in batch:
+            if image not in self.images:
+                # image has been closed
+                continue
+            if not result:
+                logger.error('Cannot read %s image data from %s',
+                             file_type, path)
+                continue
+            image.metadata.thumbnail = result
+            image.load_thumbnail()
+
     def unsaved_files_dialog(
             self, all_files=False, with_cancel=True, with_discard=True):
         """Return true if OK to continue with close or quit or whatever"""
@@ -858,25 +1675,42 @@ class ImageList(QtWidgets.QWidget):
         result = dialog.exec_()
         if result == QtWidgets.QMessageBox.Save:
             self._save_files()
+            with Busy():
+                self.saver.wait()
             return True
         return result == QtWidgets.QMessageBox.Discard
 
     def get_selected_images(self):
-        selection = []
-        for image in self.images:
-            if image.get_selected():
-                selection.append(image)
-        return selection
+        return list(self.selection.ordered(self.images))
 
     def emit_selection(self):
+        # tell tabs to refresh everything now, e.g. after metadata is
+        # reloaded, which supersedes any pending changes
+        self.selection_timer.stop()
+        self.selection.take_changes()
         self.selection_changed.emit(self.get_selected_images())
 
+    def emit_selection_delta(self):
+        # thumbnails are already highlighted, (re)start timer to tell
+        # tabs once the selection stops changing
+        self.selection_timer.start()
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def send_selection_delta(self):
+        # tell tabs which images have been selected or deselected
+        added, removed = self.selection.take_changes()
+        if not (added or removed):
+            return
+        self.selection_delta.emit(
+            list(added), list(removed), self.get_selected_images())
+
     def select_all(self):
         for image in self.images:
             image.set_selected(True)
         self.selection_anchor = None
         self.last_selected = None
-        self.emit_selection()
+        self.emit_selection_delta()
 
     def move_to_prev_thumb(self):
         self._inc_selection(-1)
@@ -909,22 +1743,25 @@ class ImageList(QtWidgets.QWidget):
     def _new_thumb_size(self, value):
         self.thumb_size = value * 20
         self.app.config_store.set('controls', 'thumb_size', str(self.thumb_size))
-        for image in self.images:
+        for image in list(self.images) + list(self.loading.values()):
             image.set_thumb_size(self.thumb_size)
+        self.thumb_view.update_layout()
         if self.last_selected:
-            self.app.processEvents()
-            self.scroll_area.ensureWidgetVisible(self.last_selected)
+            self.thumb_view.ensure_visible(self.last_selected)
 
     def select_image(
             self, image, extend_selection=False, multiple_selection=False):
-        self.scroll_area.ensureWidgetVisible(image)
+        self.thumb_view.ensure_visible(image)
         if extend_selection and self.selection_anchor:
+            # only change images between the old and new ends of the range
             idx1 = self.images.index(self.selection_anchor)
             idx2 = self.images.index(self.last_selected)
+            idx3 = self.images.index(image)
+            lo, hi = min(idx1, idx3), max(idx1, idx3)
             for i in range(min(idx1, idx2), max(idx1, idx2) + 1):
-                self.images[i].set_selected(False)
-            idx2 = self.images.index(image)
-            for i in range(min(idx1, idx2), max(idx1, idx2) + 1):
+                if i < lo or i > hi:
+                    self.images[i].set_selected(False)
+            for i in range(lo, hi + 1):
                 self.images[i].set_selected(True)
         elif multiple_selection:
             image.set_selected(not image.get_selected())
@@ -934,23 +1771,22 @@ class ImageList(QtWidgets.QWidget):
             image.set_selected(True)
             self.selection_anchor = image
         self.last_selected = image
-        self.emit_selection()
+        self.emit_selection_delta()
 
     def select_images(self, images):
         self._clear_selection()
         if not images:
             self.last_selected = None
             self.selection_anchor = None
-            self.emit_selection()
+            self.emit_selection_delta()
             return
         for image in images:
             image.set_selected(True)
-            self.scroll_area.ensureWidgetVisible(image)
+            self.thumb_view.ensure_visible(image)
         self.selection_anchor = images[0]
         self.last_selected = images[-1]
-        self.emit_selection()
+        self.emit_selection_delta()
 
     def _clear_selection(self):
-        for image in self.images:
-            if image.get_selected():
-                image.set_selected(False)
+        for image in list(self.selection.images):
+            image.set_selected(False)
@@ -16,8 +16,10 @@
 ##  along with this program.  If not, see
 ##  <http://www.gnu.org/licenses/>.
 
+import bisect
 from contextlib import contextmanager
 from datetime import datetime
+import hashlib
 import logging
 import os
 import six
@@ -30,59 +32,145 @@ try:
 except ImportError:
     gp = None
 
+from photini.cache import ImportIndex
+from photini.imageheader import probe_exif
 from photini.metadata import Metadata
-from photini.pyqt import (Busy, catch_all, image_types_lower, Qt, QtCore, QtGui,
-                          QtWidgets, StartStopButton, video_types_lower)
+from photini.pyqt import (Busy, catch_all, image_types_lower, ProgressDisplay,
+                          Qt, QtCore, QtGui, QtWidgets, StartStopButton,
+                          video_types_lower, WorkerPool)
 
 logger = logging.getLogger(__name__)
 
 class FolderSource(object):
     image_types = ['.' + x for x in image_types_lower() + video_types_lower()]
+    # size of blocks read and written when copying files
+    block_size = 1024 * 1024
 
-    def __init__(self, root):
+    def __init__(self, root, index=None):
         self.root = root
-
-    def get_file_data(self):
-        if not os.path.isdir(self.root):
-            return None
-        file_list = []
-        for root, dirs, files in os.walk(self.root):
+        self.index = index
+        self.known = {}
+
+    def load_index(self):
+        if self.index:
+            self.known = self.index.get_folder(self.root)
+
+    def save_index(self, file_data_list):
+        if self.index:
+            self.index.put(self.root, file_data_list)
+
+    def prune_index(self, paths):
+        if self.index:
+            self.index.prune(self.root, paths)
+
+    def scan(self, path):
+        # called in a worker thread, returns a list of a directory's
+        # subdirectories and new or changed image files, plus the
+        # indexed data of unchanged image files, or an image file's data
+        if not os.path.isdir(path):
+            return self.file_info(path)
+        paths = []
+        file_data_list = []
+        for root, dirs, files in os.walk(path):
+            paths += [os.path.join(root, x) for x in dirs]
             for name in files:
                 base, ext = os.path.splitext(name)
-                if ext.lower() in self.image_types:
-                    file_list.append(os.path.join(root, name))
-        file_data = {}
-        for path in file_list:
-            metadata = Metadata(path)
-            timestamp = metadata.date_taken
-            if not timestamp:
-                timestamp = metadata.date_digitised
-            if not timestamp:
-                timestamp = metadata.date_modified
-            if not timestamp:
-                # use file date as last resort
-                timestamp = datetime.fromtimestamp(os.path.getmtime(path))
-            else:
-                timestamp = timestamp.datetime
-            name = os.path.basename(path)
-            file_data[name] = {
-                'camera'    : metadata.camera_model,
-                'path'      : path,
-                'name'      : name,
-                'timestamp' : timestamp,
-                }
-        return file_data
-
-    def copy_files(self, info_list):
-        for info in info_list:
-            if not os.path.isfile(info['path']):
-                yield None
-            dest_path = info['dest_path']
-            dest_dir = os.path.dirname(dest_path)
-            if not os.path.isdir(dest_dir):
+                if ext.lower() not in self.image_types:
+                    continue
+                file_path = os.path.join(root, name)
+                file_data = self.known.get(file_path)
+                if file_data:
+                    stat = os.stat(file_path)
+                    if (file_data['size'] == stat.st_size and
+                            file_data['mtime'] == stat.st_mtime):
+                        file_data_list.append(file_data)
+                        continue
+                paths.append(file_path)
+            # subdirectories are scanned separately
+            del dirs[:]
+        return paths, file_data_list
+
+    @staticmethod
+    def file_info(path):
+        stat = os.stat(path)
+        names = ('date_taken', 'date_digitised', 'date_modified')
+        # reading Exif data directly is much quicker than using exiv2,
+        # but can't be used if there's a sidecar or no capture date is
+        # found (date_modified alone may have been set by an editor)
+        values = None
+        if not Metadata._find_side_car(path):
+            values = probe_exif(path)
+        if values and (values['date_taken'] or values['date_digitised']):
+            dates = [values[x] for x in names]
+        else:
+            values = Metadata.read_fields(path, names + ('camera_model',))
+            dates = [values[x] and values[x].datetime for x in names]
+        dates = [x for x in dates if x]
+        if dates:
+            timestamp = dates[0]
+        else:
+            # use file date as last resort
+            timestamp = datetime.fromtimestamp(stat.st_mtime)
+        return {
+            'camera'    : values['camera_model'],
+            'path'      : path,
+            'name'      : os.path.basename(path),
+            'size'      : stat.st_size,
+            'mtime'     : stat.st_mtime,
+            'timestamp' : timestamp,
+            }
+
+    @classmethod
+    def copy_file(cls, info):
+        # called in a worker thread, copies to a temporary file whose
+        # checksum is checked before it's renamed
+        dest_path = info['dest_path']
+        dest_dir = os.path.dirname(dest_path)
+        if not os.path.isdir(dest_dir):
+            try:
                 os.makedirs(dest_dir)
-            shutil.copy2(info['path'], dest_path)
-            yield info
+            except OSError:
+                # another thread may have just created it
+                if not os.path.isdir(dest_dir):
+                    raise
+        part_path = dest_path + '.part'
+        checksum = hashlib.sha1()
+        with open(info['path'], 'rb') as src:
+            mode = 'wb'
+            if os.path.exists(part_path):
+                # continue an interrupted copy, if it matches the source
+                with open(part_path, 'rb') as part:
+                    while True:
+                        data = part.read(cls.block_size)
+                        if not data:
+                            mode = 'ab'
+                            break
+                        if src.read(len(data)) != data:
+                            break
+                        checksum.update(data)
+                if mode == 'wb':
+                    src.seek(0)
+                    checksum = hashlib.sha1()
+            with open(part_path, mode) as dest:
+                while True:
+                    data = src.read(cls.block_size)
+                    if not data:
+                        break
+                    checksum.update(data)
+                    dest.write(data)
+        copy_checksum = hashlib.sha1()
+        with open(part_path, 'rb') as dest:
+            while True:
+                data = dest.read(cls.block_size)
+                if not data:
+                    break
+                copy_checksum.update(data)
+        if copy_checksum.digest() != checksum.digest():
+            os.remove(part_path)
+            raise IOError('checksum of copy does not match')
+        shutil.copystat(info['path'], part_path)
+        os.rename(part_path, dest_path)
+        return info
 
 
 class CameraSource(object):
@@ -231,13 +319,24 @@ class Importer(QtWidgets.QWidget):
             self.gp_log = gp.check_result(gp.use_python_logging())
         self.config_store = app.config_store
         self.image_list = image_list
+        self.index = None
+        if eval(self.config_store.get('files', 'use_cache', 'True')):
+            try:
+                self.index = ImportIndex()
+            except Exception as ex:
+                logger.warning('Import index not available: %s', str(ex))
         self.setLayout(QtWidgets.QGridLayout())
         form = QtWidgets.QFormLayout()
         form.setFieldGrowthPolicy(QtWidgets.QFormLayout.AllNonFixedFieldsGrow)
         self.nm = NameMangler()
         self.file_data = {}
         self.file_list = []
+        self.file_keys = []
+        self.scanned_paths = set()
+        self.sort_date = False
         self.source = None
+        self.scanner = None
+        self.copier = None
         self.import_in_progress = False
         # source selector
         box = QtWidgets.QHBoxLayout()
@@ -267,6 +366,9 @@ class Importer(QtWidgets.QWidget):
             QtWidgets.QAbstractItemView.ExtendedSelection)
         self.file_list_widget.itemSelectionChanged.connect(self.selection_changed)
         self.layout().addWidget(self.file_list_widget, 1, 0)
+        # progress of scanning a folder
+        self.progress = ProgressDisplay()
+        self.layout().addWidget(self.progress, 2, 0)
         # selection buttons
         buttons = QtWidgets.QVBoxLayout()
         buttons.addStretch(1)
@@ -282,8 +384,9 @@ class Importer(QtWidgets.QWidget):
         self.copy_button = StartStopButton(self.tr('Copy\nphotos'),
                                            self.tr('Stop\nimport'))
         self.copy_button.click_start.connect(self.copy_selected)
+        self.copy_button.click_stop.connect(self.stop_copy)
         buttons.addWidget(self.copy_button)
-        self.layout().addLayout(buttons, 0, 1, 2, 1)
+        self.layout().addLayout(buttons, 0, 1, 3, 1)
         # final initialisation
         self.image_list.sort_order_changed.connect(self.sort_file_list)
         path = os.path.expanduser('~/Pictures')
@@ -302,6 +405,7 @@ class Importer(QtWidgets.QWidget):
     @QtCore.pyqtSlot(int)
     @catch_all
     def new_source(self, idx):
+        self._stop_scan()
         self.source = None
         item_data = self.source_selector.itemData(idx)
         if callable(item_data):
@@ -370,7 +474,8 @@ class Importer(QtWidgets.QWidget):
             if os.path.isdir(root):
                 self.source_selector.addItem(
                     self.tr('folder: {0}').format(root),
-                    (FolderSource(root), 'importer folder ' + root))
+                    (FolderSource(root, index=self.index),
+                     'importer folder ' + root))
         self.source_selector.addItem(self.tr('<add a folder>'), self.add_folder)
         # restore saved selection
         new_idx = -1
@@ -403,7 +508,14 @@ class Importer(QtWidgets.QWidget):
     def new_selection(self, selection):
         pass
 
+    def update_selection(self, added, removed, selection):
+        pass
+
     def list_files(self):
+        self._stop_scan()
+        if isinstance(self.source, FolderSource):
+            self._scan_folder()
+            return
         file_data = {}
         if self.source:
             with Busy():
@@ -413,23 +525,104 @@ class Importer(QtWidgets.QWidget):
                     return
         self._new_file_list(file_data)
 
+    def _scan_folder(self):
+        if not os.path.isdir(self.source.root):
+            self._fail()
+            return
+        self._new_file_list()
+        self.scanned_paths = set()
+        self.source.load_index()
+        # files are listed as they're found, directories are expanded
+        # and files read in a pool of worker threads
+        self.scanner = WorkerPool(self.source.scan, parent=self)
+        self.scanner.batch_done.connect(self.files_scanned)
+        self.scanner.finished.connect(self.scan_finished)
+        self.scanner.start([self.source.root])
+        self.progress.start(self.tr('Scanning'), self.scanner)
+
+    def _stop_scan(self):
+        if not self.scanner:
+            return
+        self.progress.stop(self.scanner)
+        self.scanner.batch_done.disconnect(self.files_scanned)
+        self.scanner.finished.disconnect(self.scan_finished)
+        self.scanner.finished.connect(self.scanner.deleteLater)
+        self.scanner.cancel()
+        self.scanner = None
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def files_scanned(self, batch):
+        paths = []
+        new_files = []
+        for path, result, error in batch:
+            if error:
+                continue
+            if isinstance(result, dict):
+                new_files.append(result)
+                self._add_file(result)
+                continue
+            paths += result[0]
+            for file_data in result[1]:
+                self._add_file(file_data)
+        if new_files:
+            self.source.save_index(new_files)
+        if paths and not self.scanner.is_cancelled():
+            self.scanner.start(paths)
+
+    @QtCore.pyqtSlot(bool)
+    @catch_all
+    def scan_finished(self, completed):
+        self.scanner.deleteLater()
+        self.scanner = None
+        if completed:
+            # forget files that have been deleted
+            self.source.prune_index(self.scanned_paths)
+        self.scanned_paths = set()
+        self._set_example()
+        self._show_first_active()
+
+    def _add_file(self, file_data):
+        self.scanned_paths.add(file_data['path'])
+        name = file_data['name']
+        if name in self.file_data:
+            # same name in another folder replaces it
+            row = self.file_list.index(name)
+            del self.file_list[row]
+            del self.file_keys[row]
+            self.file_list_widget.takeItem(row)
+        self.file_data[name] = file_data
+        key = self._sort_key(name)
+        row = bisect.bisect_right(self.file_keys, key)
+        self.file_list.insert(row, name)
+        self.file_keys.insert(row, key)
+        self.file_list_widget.insertItem(row, self._make_item(name))
+
+    def _sort_key(self, name):
+        if self.sort_date:
+            return self.file_data[name]['timestamp'], name
+        return name
+
     def _fail(self):
         self.source_selector.setCurrentIndex(0)
         self.refresh()
 
     def _new_file_list(self, file_data={}):
         self.file_list = list(file_data.keys())
-        self.file_data = file_data
+        self.file_data = dict(file_data)
         self.sort_file_list()
 
     @QtCore.pyqtSlot()
     @catch_all
     def sort_file_list(self):
-        if eval(self.config_store.get('controls', 'sort_date', 'False')):
-            self.file_list.sort(key=lambda x: self.file_data[x]['timestamp'])
-        else:
-            self.file_list.sort()
+        self.sort_date = eval(
+            self.config_store.get('controls', 'sort_date', 'False'))
+        self.file_list.sort(key=self._sort_key)
+        self.file_keys = [self._sort_key(x) for x in self.file_list]
         self.show_file_list()
+        self._set_example()
+
+    def _set_example(self):
         if self.file_list:
             example = self.file_data[self.file_list[-1]]
         else:
@@ -442,25 +635,30 @@ class Importer(QtWidgets.QWidget):
 
     def show_file_list(self):
         self.file_list_widget.clear()
-        first_active = None
-        item = None
         for name in self.file_list:
-            file_data = self.file_data[name]
-            dest_path = self.nm.transform(file_data)
-            file_data['dest_path'] = dest_path
-            item = QtWidgets.QListWidgetItem(name + ' -> ' + dest_path)
-            item.setData(Qt.UserRole, name)
-            if os.path.exists(dest_path):
-                item.setFlags(Qt.NoItemFlags)
-            else:
-                if not first_active:
-                    first_active = item
-                item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
-            self.file_list_widget.addItem(item)
-        if not first_active:
-            first_active = item
+            self.file_list_widget.addItem(self._make_item(name))
+        self._show_first_active()
+
+    def _make_item(self, name):
+        file_data = self.file_data[name]
+        dest_path = self.nm.transform(file_data)
+        file_data['dest_path'] = dest_path
+        item = QtWidgets.QListWidgetItem(name + ' -> ' + dest_path)
+        item.setData(Qt.UserRole, name)
+        if os.path.exists(dest_path):
+            item.setFlags(Qt.NoItemFlags)
+        else:
+            item.setFlags(Qt.ItemIsSelectable | Qt.ItemIsEnabled)
+        return item
+
+    def _show_first_active(self):
+        item = None
+        for row in range(self.file_list_widget.count()):
+            item = self.file_list_widget.item(row)
+            if item.flags() & Qt.ItemIsSelectable:
+                break
         self.file_list_widget.scrollToItem(
-            first_active, QtWidgets.QAbstractItemView.PositionAtTop)
+            item, QtWidgets.QAbstractItemView.PositionAtTop)
 
     @QtCore.pyqtSlot()
     @catch_all
@@ -519,6 +717,9 @@ class Importer(QtWidgets.QWidget):
         for item in self.file_list_widget.selectedItems():
             name = item.data(Qt.UserRole)
             copy_list.append(self.file_data[name])
+        if isinstance(self.source, FolderSource):
+            self._copy_folder(copy_list)
+            return
         last_item = None, datetime.min
         with Busy():
             for item in self.source.copy_files(copy_list):
@@ -541,6 +742,70 @@ class Importer(QtWidgets.QWidget):
         self.copy_button.setChecked(False)
         self.import_in_progress = False
 
+    def _copy_folder(self, copy_list):
+        self.last_item = None, datetime.min
+        self.copy_errors = []
+        # two files with the same destination would be copied to the
+        # same temporary file at once, so only the first is copied
+        dest_paths = {}
+        unique_list = []
+        for info in copy_list:
+            dest_path = info['dest_path']
+            if dest_path in dest_paths:
+                self.copy_errors.append('{}: {} {}'.format(
+                    info['path'], self.tr('has the same destination as'),
+                    dest_paths[dest_path]))
+                continue
+            dest_paths[dest_path] = info['path']
+            unique_list.append(info)
+        # a few threads are enough to keep the disks busy
+        self.copier = WorkerPool(FolderSource.copy_file, max_threads=4,
+                                 parent=self)
+        self.copier.batch_done.connect(self.files_copied)
+        self.copier.finished.connect(self.copy_finished)
+        self.copier.start(unique_list)
+        self.progress.start(self.tr('Copying'), self.copier)
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def stop_copy(self):
+        if self.copier:
+            self.copier.cancel()
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def files_copied(self, batch):
+        paths = []
+        for info, result, error in batch:
+            if error:
+                self.copy_errors.append('{}: {}'.format(info['name'], error))
+                continue
+            paths.append(info['dest_path'])
+            if self.last_item[1] < info['timestamp']:
+                self.last_item = info['dest_path'], info['timestamp']
+        self.image_list.open_file_list(paths)
+
+    @QtCore.pyqtSlot(bool)
+    @catch_all
+    def copy_finished(self, completed):
+        self.copier.deleteLater()
+        self.copier = None
+        if self.last_item[0]:
+            self.config_store.set(self.config_section, 'last_transfer',
+                                  self.last_item[1].isoformat(' '))
+            self.image_list.done_opening(self.last_item[0])
+        self.show_file_list()
+        self.copy_button.setChecked(False)
+        self.import_in_progress = False
+        if self.copy_errors:
+            dialog = QtWidgets.QMessageBox(self)
+            dialog.setWindowTitle(self.tr('Photini: import error'))
+            dialog.setText(self.tr('<h3>Some files could not be copied.</h3>'))
+            dialog.setDetailedText('\n'.join(self.copy_errors))
+            dialog.setIcon(QtWidgets.QMessageBox.Warning)
+            self.copy_errors = []
+            dialog.exec_()
+
     def abort_copy(self):
         # test if user has stopped copy or quit program
         QtCore.QCoreApplication.processEvents()
@@ -19,6 +19,7 @@
 from __future__ import unicode_literals
 
 import codecs
+from collections import defaultdict
 from datetime import datetime
 from fractions import Fraction
 import locale
@@ -32,7 +33,16 @@ import six
 
 from photini import __version__
 from photini.gi import gexiv2_version, GLib, GObject, GExiv2, using_pgi
-from photini.pyqt import QtCore, QtGui
+from photini.imageheader import probe_data
+try:
+    from photini.pyqt import QtCore, QtGui
+except ImportError:
+    # can still be used without a GUI, e.g. by photini.batch
+    QtCore = QtGui = None
+try:
+    import PIL.Image as PIL
+except ImportError:
+    PIL = None
 
 logger = logging.getLogger(__name__)
 
@@ -81,6 +91,42 @@ def decode_UCS2(value):
     value = bytearray(map(int, value.split()))
     return value.decode('utf_16', errors='ignore').strip('\x00')
 
+# Image data handling for thumbnails. Qt is preferred, but PIL is used
+# if Qt isn't available. QImage is used rather than QPixmap as this may
+# not be the GUI thread.
+def image_size(data):
+    fmt, w, h = probe_data(data)
+    if w and h:
+        return w, h
+    # unusual format, decode the whole image
+    if QtGui:
+        image = QtGui.QImage()
+        if image.loadFromData(data):
+            return image.width(), image.height()
+    elif PIL:
+        try:
+            return PIL.open(six.BytesIO(data)).size
+        except Exception as ex:
+            logger.error(str(ex))
+    return None, None
+
+def convert_to_jpeg(data):
+    if QtGui:
+        image = QtGui.QImage()
+        if image.loadFromData(data):
+            buf = QtCore.QBuffer()
+            buf.open(QtCore.QIODevice.WriteOnly)
+            image.save(buf, 'JPEG')
+            return buf.data().data()
+    elif PIL:
+        try:
+            buf = six.BytesIO()
+            PIL.open(six.BytesIO(data)).convert('RGB').save(buf, 'JPEG')
+            return buf.getvalue()
+        except Exception as ex:
+            logger.error(str(ex))
+    return None
+
 class MD_Value(object):
     # mixin for "metadata objects" - Python types with additional functionality
     def __bool__(self):
@@ -447,29 +493,20 @@ class Thumbnail(MD_Dict):
                 return None
             fmt = handler.get_tag_string(tag)
             fmt = ('TIFF', 'JPEG')[fmt == '6']
-            pixmap = QtGui.QPixmap()
-            pixmap.loadFromData(data)
-            w = pixmap.width()
-            h = pixmap.height()
+            w, h = image_size(data)
         return cls((data, fmt, w, h))
 
     def write(self, handler, tag):
         if handler.is_xmp_tag(tag):
             data = self.data
             if self.fmt != 'JPEG':
-                pixmap = QtGui.QPixmap()
-                pixmap.loadFromData(data)
-                buf = QtCore.QBuffer()
-                buf.open(QtCore.QIODevice.WriteOnly)
-                pixmap.save(buf, 'JPEG')
-                data = buf.data().data()
-                self.w = pixmap.width()
-                self.h = pixmap.height()
+                data = convert_to_jpeg(data)
+                self.w = None
+            if not data:
+                handler.clear_value(tag)
+                return
             if not self.w or not self.h:
-                pixmap = QtGui.QPixmap()
-                pixmap.loadFromData(data)
-                self.w = pixmap.width()
-                self.h = pixmap.height()
+                self.w, self.h = image_size(data)
             data = codecs.encode(data, 'base64_codec')
             if not six.PY2:
                 data = data.decode('ASCII')
@@ -949,34 +986,62 @@ class MetadataHandler(GExiv2.Metadata):
         self._path = path
         # read metadata from file
         self.open_path(self._path)
+        self._index_tags()
         self._xmp_only = self.get_mime_type() in (
             'application/rdf+xml', 'application/postscript')
-        # make list of possible character encodings
-        self._encodings = []
-        for name in ('utf_8', 'latin_1'):
-            self._encodings.append(codecs.lookup(name).name)
-        char_set = locale.getdefaultlocale()[1]
-        if char_set:
-            try:
-                name = codecs.lookup(char_set).name
-                if name not in self._encodings:
-                    self._encodings.append(name)
-            except LookupError:
-                pass
-        # convert IPTC data to UTF-8
+        self._encodings = self.default_encodings()
+        # IPTC data in other character sets is decoded when it's read
+        # and converted to UTF-8 when the file is saved, rather than
+        # converting every tag when the file is opened
+        self._iptc_encodings = None
+        self._iptc_converted = set()
         if not self.has_iptc():
             return
         current_encoding = CharacterSet.read(self, 'Iptc.Envelope.CharacterSet')
+        if current_encoding == 'utf_8':
+            return
+        self._iptc_encodings = list(self._encodings)
         if current_encoding:
-            if current_encoding == 'utf_8':
-                return
             try:
                 name = codecs.lookup(current_encoding).name
-                if name not in self._encodings:
-                    self._encodings.insert(0, name)
+                if name not in self._iptc_encodings:
+                    self._iptc_encodings.insert(0, name)
             except LookupError:
                 pass
+
+    _default_encodings = None
+
+    @classmethod
+    def default_encodings(cls):
+        # make list of possible character encodings, once per process
+        if cls._default_encodings is None:
+            encodings = []
+            for name in ('utf_8', 'latin_1'):
+                encodings.append(codecs.lookup(name).name)
+            char_set = locale.getdefaultlocale()[1]
+            if char_set:
+                try:
+                    name = codecs.lookup(char_set).name
+                    if name not in encodings:
+                        encodings.append(name)
+                except LookupError:
+                    pass
+            cls._default_encodings = encodings
+        return cls._default_encodings
+
+    def _tag_encodings(self, tag):
+        if (self._iptc_encodings and tag not in self._iptc_converted
+                and self.is_iptc_tag(tag)):
+            return self._iptc_encodings
+        return self._encodings
+
+    def convert_iptc(self):
+        # convert any IPTC strings that haven't been rewritten to UTF-8
+        if not self._iptc_encodings:
+            return
         for tag in self.get_iptc_tags():
+            if tag in self._iptc_converted:
+                continue
             if self.get_tag_type(tag) == 'String':
                 try:
                     if tag in _repeatable:
@@ -985,11 +1050,12 @@ class MetadataHandler(GExiv2.Metadata):
                         self.set_string(tag, self.get_string(tag))
                 except Exception as ex:
                     logger.exception(ex)
+        self._iptc_encodings = None
 
-    def _decode_string(self, value):
+    def _decode_string(self, value, encodings=None):
         if not value:
             return value
-        for encoding in self._encodings:
+        for encoding in encodings or self._encodings:
             try:
                 return value.decode(encoding)
             except UnicodeDecodeError:
@@ -998,6 +1064,69 @@ class MetadataHandler(GExiv2.Metadata):
 
     _parse_xmp_struct = re.compile('(.+?)(?:\[(\d+)\])?/')
 
+    # Keep a set of tag names, and a count of XMP tags in each top level
+    # property, so tests for tags and XMP containers don't need to list
+    # every tag. The index must be updated whenever tags are added or
+    # removed.
+    def _index_tags(self):
+        self._tag_index = set()
+        self._container_count = defaultdict(int)
+        for tag in self.list_tags():
+            self._add_to_index(tag)
+
+    @staticmethod
+    def _container(tag):
+        return tag.split('/')[0].split('[')[0]
+
+    def _add_to_index(self, tag):
+        if tag in self._tag_index:
+            return
+        self._tag_index.add(tag)
+        if tag.startswith('Xmp.'):
+            self._container_count[self._container(tag)] += 1
+
+    def _remove_from_index(self, tag):
+        if tag not in self._tag_index:
+            return
+        self._tag_index.remove(tag)
+        if tag.startswith('Xmp.'):
+            self._container_count[self._container(tag)] -= 1
+
+    def has_tag(self, tag):
+        return tag in self._tag_index
+
+    def has_container(self, bag):
+        return self._container_count.get(bag, 0) > 0
+
+    def set_tag_string(self, tag, value):
+        result = super(MetadataHandler, self).set_tag_string(tag, value)
+        self._add_to_index(tag)
+        if self._iptc_encodings:
+            self._iptc_converted.add(tag)
+        return result
+
+    def set_tag_multiple(self, tag, value):
+        result = super(MetadataHandler, self).set_tag_multiple(tag, value)
+        self._add_to_index(tag)
+        if self._iptc_encodings:
+            self._iptc_converted.add(tag)
+        return result
+
+    def set_xmp_tag_struct(self, tag, type_):
+        result = super(MetadataHandler, self).set_xmp_tag_struct(tag, type_)
+        self._add_to_index(tag)
+        return result
+
+    def clear_tag(self, tag):
+        result = super(MetadataHandler, self).clear_tag(tag)
+        self._remove_from_index(tag)
+        return result
+
+    def set_exif_thumbnail_from_buffer(self, data):
+        super(MetadataHandler, self).set_exif_thumbnail_from_buffer(data)
+        # adds several Exif.Thumbnail tags
+        self._index_tags()
+
     def clear_value(self, tag):
         if isinstance(tag, tuple):
             for sub_tag in tag:
@@ -1009,14 +1138,8 @@ class MetadataHandler(GExiv2.Metadata):
         if self.is_xmp_tag(tag) and '/' in tag:
             # GExiv2 won't delete container, so leave a value in it
             match = self._parse_xmp_struct.match(tag)
-            if match:
-                bag = match.group(1)
-                for t in self.get_xmp_tags():
-                    if t.startswith(bag):
-                        # container is not empty
-                        break
-                else:
-                    self.set_tag_string(tag, ' ')
+            if match and not self.has_container(match.group(1)):
+                self.set_tag_string(tag, ' ')
 
     def get_raw(self, tag):
         try:
@@ -1063,10 +1186,11 @@ class MetadataHandler(GExiv2.Metadata):
             else:
                 result = result.decode('ascii', 'replace')
             return result.strip('\x00')
+        encodings = self._tag_encodings(tag)
         try:
             result = self.get_tag_string(tag)
             if six.PY2:
-                result = self._decode_string(result)
+                result = self._decode_string(result, encodings)
             return result
         except UnicodeDecodeError as ex:
             pass
@@ -1074,7 +1198,7 @@ class MetadataHandler(GExiv2.Metadata):
         result = self.get_raw(tag)
         if not result:
             return None
-        return self._decode_string(result).strip('\x00')
+        return self._decode_string(result, encodings).strip('\x00')
 
     def get_multiple(self, tag):
         if isinstance(tag, tuple):
@@ -1084,10 +1208,11 @@ class MetadataHandler(GExiv2.Metadata):
         if not six.PY2 and not using_pgi and self.is_iptc_tag(tag):
             # PyGObject segfaults if strings are not utf8
             return [self.get_string(tag)]
+        encodings = self._tag_encodings(tag)
         try:
             result = self.get_tag_multiple(tag)
             if six.PY2:
-                result = list(map(self._decode_string, result))
+                result = [self._decode_string(x, encodings) for x in result]
             return result
         except UnicodeDecodeError as ex:
             pass
@@ -1095,7 +1220,7 @@ class MetadataHandler(GExiv2.Metadata):
         result = self.get_raw(tag)
         if not result:
             return []
-        return [self._decode_string(result).strip('\x00')]
+        return [self._decode_string(result, encodings).strip('\x00')]
 
     def set_string(self, tag, value):
         if isinstance(tag, tuple):
@@ -1114,17 +1239,12 @@ class MetadataHandler(GExiv2.Metadata):
         if self.is_xmp_tag(tag) and '/' in tag:
             # create XMP structure/container
             match = self._parse_xmp_struct.match(tag)
-            if match:
+            if match and not self.has_container(match.group(1)):
                 bag = match.group(1)
-                for t in self.get_xmp_tags():
-                    if t.startswith(bag):
-                        # container already exists
-                        break
+                if gexiv2_version >= (0, 10, 3):
+                    self.set_xmp_tag_struct(bag, _xmp_struct_type[bag])
                 else:
-                    if gexiv2_version >= (0, 10, 3):
-                        self.set_xmp_tag_struct(bag, _xmp_struct_type[bag])
-                    else:
-                        super(MetadataHandler, self).set_tag_string(bag, '')
+                    self.set_tag_string(bag, '')
         self.set_tag_string(tag, value)
 
     def set_multiple(self, tag, value):
@@ -1181,6 +1301,7 @@ class MetadataHandler(GExiv2.Metadata):
         if not (self.get_supports_xmp() or self.get_supports_exif()):
             return False
         try:
+            self.convert_iptc()
             self.save_file(self._path)
             if file_times:
                 os.utime(self._path, file_times)
@@ -1216,6 +1337,10 @@ class MetadataHandler(GExiv2.Metadata):
                 self.set_multiple(tag, other.get_multiple(tag))
 
     def get_all_tags(self):
+        return list(self._tag_index)
+
+    def list_tags(self):
+        # get list of tags from exiv2, rather than from the index
         return self.get_exif_tags() + self.get_iptc_tags() + self.get_xmp_tags()
 
     def get_exif_thumbnail(self):
@@ -1228,9 +1353,40 @@ class MetadataHandler(GExiv2.Metadata):
         return None
 
 
-class Metadata(QtCore.QObject):
-    unsaved = QtCore.pyqtSignal(bool)
+def get_preview(path, min_size):
+    """Get the smallest preview image embedded in a file (typically a
+    raw file) that is at least min_size pixels wide and high.
+
+    Returns the image data, or None if there is no suitable preview.
+    Only the metadata is read, not the file's image data, so this is
+    much quicker than decoding a raw image.
 
+    """
+    md = GExiv2.Metadata()
+    try:
+        md.open_path(path)
+    except GLib.Error as ex:
+        logger.error('%s: %s', path, str(ex))
+        return None
+    best = None
+    for props in md.get_preview_properties() or []:
+        w, h = props.get_width(), props.get_height()
+        if min(w, h) < min_size:
+            continue
+        if best and w * h >= best.get_width() * best.get_height():
+            continue
+        best = props
+    if not best:
+        return None
+    data = md.get_preview_image(best).get_data()
+    if using_pgi and isinstance(data, tuple):
+        data = data[data[0]]
+    if not data:
+        return None
+    return bytes(bytearray(data))
+
+
+class Metadata(object):
     # type of each Photini data field's data
     _data_type = {
         'aperture'       : Aperture,
@@ -1423,31 +1579,124 @@ class Metadata(QtCore.QObject):
                             ('RA.W0', 'Exif.Image.XPTitle'),
                             ('RA.W0', 'Iptc.Application2.Headline')),
         }
-    def __init__(self, path, *args, **kw):
-        super(Metadata, self).__init__(*args, **kw)
-        # create metadata handlers for image file and/or sidecar
+
+    # optional persistent store of metadata values, see photini.cache
+    cache = None
+
+    def __init__(self, path, handlers=None, values=None, notify=None):
+        super(Metadata, self).__init__()
+        # function to call when 'dirty' status changes
+        self.notify = notify
+        # create metadata handlers for image file and/or sidecar, unless
+        # they've already been created by read_file
         self._path = path
-        self._sc_path = self._find_side_car(path)
-        self._sc = None
-        if self._sc_path:
+        if handlers is None and values is None:
+            if self.cache:
+                handlers, values = self.read_file(path)
+            else:
+                handlers = self.open_handlers(path)
+        if handlers:
+            self._sc_path, self._sc, self._if = handlers
+        # else handlers are opened by __getattr__ when first needed
+        self._mime_type = None
+        self.pending_verify = None
+        if values:
+            self._mime_type = values['mime_type']
+            for name in self._tag_list:
+                if name in values:
+                    super(Metadata, self).__setattr__(name, values[name])
+        self.dirty = False
+        # names of fields changed since the file was read or saved
+        self.edited = set()
+
+    @classmethod
+    def read_file(cls, path):
+        """Read metadata from an image file and its sidecar (if any).
+
+        If the metadata cache is in use, and has an entry for the
+        unchanged file, its values are returned instead of opening the
+        file. No Qt objects are created, so this can be run in a worker
+        thread. The result can be passed to the Metadata constructor.
+
+        """
+        cache = cls.cache
+        if cache:
+            key = cache.file_key(path, cls._find_side_car(path))
+            values = cache.get(path, key)
+            if values:
+                return None, values
+        handlers = cls.open_handlers(path)
+        values = cls.read_values(path, handlers)
+        if cache:
+            cache.put(path, key, values)
+        return handlers, values
+
+    @classmethod
+    def file_stamp(cls, path):
+        """Return (size, mtime, sidecar path, sidecar mtime) of an image
+        file, to detect changes made by other programs."""
+        stat = os.stat(path)
+        sc_path = cls._find_side_car(path)
+        sc_mtime = None
+        if sc_path:
+            sc_mtime = os.path.getmtime(sc_path)
+        return stat.st_size, stat.st_mtime, sc_path, sc_mtime
+
+    @classmethod
+    def open_handlers(cls, path):
+        sc_path = cls._find_side_car(path)
+        sc = None
+        if sc_path:
             try:
-                self._sc = MetadataHandler(self._sc_path)
+                sc = MetadataHandler(sc_path)
             except Exception as ex:
                 logger.exception(ex)
-        self._if = None
+        image_file = None
         try:
-            self._if = MetadataHandler(path)
+            image_file = MetadataHandler(path)
         except GLib.Error:
             # expected if unrecognised file format
             pass
         except Exception as ex:
             logger.exception(ex)
-        self.dirty = False
+        return sc_path, sc, image_file
+
+    @classmethod
+    def read_values(cls, path, handlers):
+        # read every field in one pass, listing each handler's tags
+        # once instead of testing for each tag of each field
+        sc_path, sc, image_file = handlers
+        snapshots = cls._snapshot(sc), cls._snapshot(image_file)
+        values = {}
+        for name in cls._tag_list:
+            values[name] = cls._read_value(path, name, snapshots)
+        for name in ('date_digitised', 'date_modified', 'date_taken'):
+            values[name] = cls._merge_timezone(
+                path, name, values[name], values['timezone'])
+        values['mime_type'] = ''
+        if image_file:
+            values['mime_type'] = image_file.get_mime_type()
+        return values
+
+    @classmethod
+    def read_fields(cls, path, names):
+        """Read a few fields from an image file and its sidecar (if
+        any), without using the metadata cache. No Qt objects are
+        created, so this can be run in a worker thread.
+
+        """
+        sc_path, sc, image_file = cls.open_handlers(path)
+        snapshots = cls._snapshot(sc), cls._snapshot(image_file)
+        values = {}
+        for name in names:
+            values[name] = cls._read_value(path, name, snapshots)
+        return values
 
     @classmethod
     def clone(cls, path, other, *args, **kw):
         if other._if:
             # use exiv2 to clone image file metadata
+            other._if.convert_iptc()
             other._if.save_file(path)
         self = cls(path, *args, **kw)
         if other._sc and self._if:
@@ -1455,7 +1704,8 @@ class Metadata(QtCore.QObject):
             self._if.merge_sc(other._sc)
         return self
 
-    def _find_side_car(self, path):
+    @staticmethod
+    def _find_side_car(path):
         for base in (os.path.splitext(path)[0], path):
             for ext in ('.xmp', '.XMP'):
                 result = base + ext
@@ -1471,6 +1721,7 @@ class Metadata(QtCore.QObject):
                     'xmlns:xmp="http://ns.adobe.com/xap/1.0/"'))
             if self._if:
                 # let exiv2 copy as much metadata as it can into sidecar
+                self._if.convert_iptc()
                 self._if.save_file(self._sc_path)
             self._sc = MetadataHandler(self._sc_path)
             self._sc.set_string(
@@ -1479,14 +1730,41 @@ class Metadata(QtCore.QObject):
             logger.exception(ex)
             self._sc = None
 
-    def save(self, if_mode=True, sc_mode='auto',
-             force_iptc=False, file_times=None):
+    def save(self, if_mode=True, sc_mode='auto', force_iptc=False,
+             file_times=None, verify='tags', defer_verify=False):
+        """Save metadata to image file and/or sidecar.
+
+        Returns None if successful, or an error message.
+
+        """
         if not self.dirty:
-            return
-        if (sc_mode == 'always' or not self._if) and not self._sc:
-            self.create_side_car()
+            return None
+        values = self.get_values()
+        error = self.write_files(
+            values, if_mode=if_mode, sc_mode=sc_mode, force_iptc=force_iptc,
+            file_times=file_times, verify=verify, defer_verify=defer_verify)
+        self.save_finished(values, error)
+        return error
+
+    def get_values(self):
+        # get all values to be saved, for use by write_files
         self.software = 'Photini editor v' + __version__
         self.character_set = 'utf_8'
+        return dict((name, getattr(self, name)) for name in self._tag_list)
+
+    def write_files(self, values, if_mode=True, sc_mode='auto',
+                    force_iptc=False, file_times=None,
+                    verify='tags', defer_verify=False):
+        """Write values from get_values to image file and/or sidecar.
+
+        Only the exiv2 handlers are used, so this can be run in a worker
+        thread. Returns None if successful, or an error message.
+
+        """
+        if self.cache:
+            self.cache.remove(self._path)
+        if (sc_mode == 'always' or not self._if) and not self._sc:
+            self.create_side_car()
         try:
             if self._if and sc_mode == 'delete' and self._sc:
                 self._if.merge_sc(self._sc)
@@ -1504,7 +1782,7 @@ class Metadata(QtCore.QObject):
                 omit_iptc = not (handler.get_supports_iptc() and
                                  (force_iptc or handler.has_iptc()))
                 for name in self._tag_list:
-                    value = getattr(self, name)
+                    value = values[name]
                     for mode, tag in self._tag_list[name]:
                         if ((omit_exif and handler.is_exif_tag(tag)) or
                             (omit_iptc and handler.is_iptc_tag(tag))):
@@ -1521,21 +1799,22 @@ class Metadata(QtCore.QObject):
             OK = False
             if self._if and if_mode:
                 OK = self._if.save(file_times)
-                if OK:
+                if OK and verify != 'off':
                     # check that data really was saved
-                    saved_tags = MetadataHandler(self._path).get_all_tags()
-                    for tag in self._if.get_all_tags():
-                        if tag in ('Exif.Image.GPSTag',):
-                            # some tags disappear with good reason
-                            continue
-                        if tag not in saved_tags:
-                            logger.warning('tag not saved: %s', tag)
+                    expected = self._verify_data(verify)
+                    if defer_verify:
+                        self.pending_verify = verify, expected
+                    else:
+                        for name in self.verify_file(
+                                self._path, verify, expected):
+                            logger.warning('%s: not saved: %s',
+                                           os.path.basename(self._path), name)
                             OK = False
                 if not OK and not self._sc:
                     # can't write to image so create side car
-                    self.save(if_mode=False, sc_mode='always',
-                              force_iptc=force_iptc, file_times=file_times)
-                    return
+                    return self.write_files(
+                        values, if_mode=False, sc_mode='always',
+                        force_iptc=force_iptc, file_times=file_times)
             if sc_mode == 'delete' and self._sc and OK:
                 os.unlink(self._sc_path)
                 self._sc = None
@@ -1543,35 +1822,94 @@ class Metadata(QtCore.QObject):
                 OK = self._sc.save(file_times)
         except Exception as ex:
             logger.exception(ex)
+            return six.text_type(ex)
+        if not OK:
+            return 'File not saved'
+        return None
+
+    def save_finished(self, values, error):
+        # values that were edited during the save are still unsaved
+        if error:
             return
-        if OK:
-            self.dirty = False
-            self.unsaved.emit(self.dirty)
+        for name in self._tag_list:
+            if getattr(self, name) != values[name]:
+                return
+        self.dirty = False
+        self.edited = set()
+        self._notify()
+
+    def _verify_data(self, level):
+        # get what should be read back from a saved image file
+        if level == 'tags':
+            return set(self._if.list_tags())
+        values = self.read_values(self._path, (None, None, self._if))
+        del values['mime_type']
+        return values
+
+    @classmethod
+    def verify_file(cls, path, level, expected):
+        """Re-read a saved image file and return a list of tags (level
+        'tags') or Photini fields (level 'full') that weren't saved.
+
+        No Qt objects are created, so this can be run in a worker
+        thread.
+
+        """
+        handler = MetadataHandler(path)
+        if level == 'tags':
+            saved = set(handler.list_tags())
+            # some tags disappear with good reason
+            return sorted(x for x in expected - saved
+                          if x not in ('Exif.Image.GPSTag',))
+        saved = cls.read_values(path, (None, None, handler))
+        return sorted(x for x in expected if saved[x] != expected[x])
+
+    def set_unsaved(self):
+        # e.g. if deferred verification has failed
+        self.dirty = True
+        self._notify()
 
     def get_mime_type(self):
-        if self._if:
-            return self._if.get_mime_type()
-        return None
+        if self._mime_type is None:
+            self._mime_type = ''
+            if self._if:
+                self._mime_type = self._if.get_mime_type()
+        return self._mime_type or None
 
-    def __getattr__(self, name):
-        if name not in self._tag_list:
-            raise AttributeError(
-                "%s has no attribute %s" % (self.__class__, name))
+    @staticmethod
+    def _snapshot(handler, list_tags=True):
+        # get handler properties needed to read values, including a set
+        # of all its tags if list_tags is set
+        if not handler:
+            return None
+        tags = None
+        if list_tags:
+            tags = set(handler.get_all_tags())
+        return (handler, tags, handler.get_supports_exif(),
+                handler.get_supports_iptc())
+
+    @classmethod
+    def _read_value(cls, path, name, snapshots):
         # read data values
         values = []
-        for handler in self._sc, self._if:
-            if not handler:
+        for snapshot in snapshots:
+            if not snapshot:
                 continue
-            omit_exif = not handler.get_supports_exif()
-            omit_iptc = not handler.get_supports_iptc()
-            for mode, tag in self._tag_list[name]:
+            handler, tags, supports_exif, supports_iptc = snapshot
+            for mode, tag in cls._tag_list[name]:
                 if mode.split('.')[0] == 'RN':
                     continue
-                if ((omit_exif and handler.is_exif_tag(tag)) or
-                    (omit_iptc and handler.is_iptc_tag(tag))):
+                if tags is not None:
+                    if isinstance(tag, tuple):
+                        if not any(x in tags for x in tag):
+                            continue
+                    elif tag not in tags:
+                        continue
+                if ((not supports_exif and handler.is_exif_tag(tag)) or
+                    (not supports_iptc and handler.is_iptc_tag(tag))):
                     continue
                 try:
-                    new_value = self._data_type[name].read(handler, tag)
+                    new_value = cls._data_type[name].read(handler, tag)
                 except Exception as ex:
                     logger.exception(ex)
                     continue
@@ -1582,16 +1920,36 @@ class Metadata(QtCore.QObject):
         # choose result and merge in non-matching data so user can review it
         result = None
         if values:
-            info = '{}({})'.format(os.path.basename(self._path), name)
+            info = '{}({})'.format(os.path.basename(path), name)
             tag, result = values.pop(0)
             logger.debug('%s: set from %s', info, tag)
         for tag, value in values:
             result = result.merge(info, tag, value)
+        return result
+
+    @staticmethod
+    def _merge_timezone(path, name, result, timezone):
         # merge in camera timezone if needed
-        if (result and name.startswith('date_') and
-                            result.tz_offset is None and self.timezone):
-            result.tz_offset = self.timezone
-            logger.info('%s: merged camera timezone offset', info)
+        if result and result.tz_offset is None and timezone:
+            result.tz_offset = timezone
+            logger.info('%s(%s): merged camera timezone offset',
+                        os.path.basename(path), name)
+        return result
+
+    def __getattr__(self, name):
+        if name in ('_sc_path', '_sc', '_if'):
+            # values were read from cache, so open files now
+            self._sc_path, self._sc, self._if = self.open_handlers(self._path)
+            return getattr(self, name)
+        if name not in self._tag_list:
+            raise AttributeError(
+                "%s has no attribute %s" % (self.__class__, name))
+        result = self._read_value(
+            self._path, name, (self._snapshot(self._sc, list_tags=False),
+                               self._snapshot(self._if, list_tags=False)))
+        if name.startswith('date_'):
+            result = self._merge_timezone(
+                self._path, name, result, self.timezone)
         # add value to object attributes so __getattr__ doesn't get
         # called again
         super(Metadata, self).__setattr__(name, result)
@@ -1611,7 +1969,13 @@ class Metadata(QtCore.QObject):
         super(Metadata, self).__setattr__(name, value)
         if not self.dirty:
             self.dirty = True
-        self.unsaved.emit(self.dirty)
+        self.edited.add(name)
+        self._notify(name)
+
+    def _notify(self, name=None):
+        # name is the field that has changed, if any
+        if self.notify:
+            self.notify(self.dirty, name)
 
     def changed(self):
         return self.dirty
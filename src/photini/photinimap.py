@@ -18,7 +18,7 @@
 
 from __future__ import unicode_literals
 
-from collections import defaultdict, OrderedDict
+from collections import OrderedDict
 import locale
 import logging
 import os
@@ -35,6 +35,7 @@ from photini.pyqt import (
     Busy, catch_all, ComboBox, CompactButton, Qt, QtCore, QtGui, QtWebChannel,
     QtWebEngineWidgets, QtWebKit, QtWebKitWidgets, QtWidgets, qt_version_info,
     scale_font, set_symbol_font, SingleLineEdit, SquareButton)
+from photini.summary import member_values
 
 logger = logging.getLogger(__name__)
 translate = QtCore.QCoreApplication.translate
@@ -204,6 +205,7 @@ class PhotiniMap(QtWidgets.QSplitter):
         self.search_string = None
         self.map_loaded = False
         self.marker_info = {}
+        self.image_markers = {}
         self.map_status = {}
         self.dropped_images = []
         self.setChildrenCollapsible(False)
@@ -482,13 +484,9 @@ class PhotiniMap(QtWidgets.QSplitter):
 
     def see_selection(self):
         locations = []
-        for image in self.image_list.get_selected_images():
-            latlong = image.metadata.latlong
-            if not latlong:
-                continue
-            location = [latlong.lat, latlong.lon]
-            if location not in locations:
-                locations.append(location)
+        for latlong in self.image_list.summary.values('latlong'):
+            if latlong:
+                locations.append([latlong.lat, latlong.lon])
         if not locations:
             return
         self.JavaScript('fitPoints({})'.format(repr(locations)))
@@ -591,16 +589,11 @@ class PhotiniMap(QtWidgets.QSplitter):
         QtCore.QTimer.singleShot(0, self.display_location)
 
     def display_coords(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
             self.coords.set_value(None)
             self.auto_location.setEnabled(False)
             return
-        values = []
-        for image in images:
-            value = image.metadata.latlong
-            if value not in values:
-                values.append(value)
+        values = self.image_list.summary.values('latlong')
         if len(values) > 1:
             self.coords.set_multiple(choices=filter(None, values))
             self.auto_location.setEnabled(False)
@@ -617,12 +610,13 @@ class PhotiniMap(QtWidgets.QSplitter):
         self.location_info.setTabText(idx, text)
 
     def display_location(self):
-        images = self.image_list.get_selected_images()
+        summary = self.image_list.summary
+        locations_shown = summary.values('location_shown')
         # get required number of tabs
         count = 0
-        for image in images:
-            if image.metadata.location_shown:
-                count = max(count, len(image.metadata.location_shown))
+        for location_shown in locations_shown:
+            if location_shown:
+                count = max(count, len(location_shown))
         count += 2
         # add or remove tabs
         if self.location_info.currentIndex() >= count:
@@ -643,16 +637,17 @@ class PhotiniMap(QtWidgets.QSplitter):
         # display data
         for idx in range(count):
             widget = self.location_info.widget(idx)
-            if images:
-                values = defaultdict(list)
-                for image in images:
-                    location = self._get_location(image, idx) or {}
-                    for key in widget.members:
-                        value = None
-                        if key in location:
-                            value = location[key]
-                        if value not in values[key]:
-                            values[key].append(value)
+            if summary:
+                if idx == 0:
+                    locations = summary.values('location_taken')
+                else:
+                    locations = []
+                    for location_shown in locations_shown:
+                        if location_shown and idx <= len(location_shown):
+                            locations.append(location_shown[idx - 1])
+                        else:
+                            locations.append(None)
+                values = member_values(locations, list(widget.members))
                 for key in widget.members:
                     if len(values[key]) > 1:
                         widget.members[key].set_multiple(
@@ -673,16 +668,30 @@ class PhotiniMap(QtWidgets.QSplitter):
         self.display_location()
         self.see_selection()
 
+    def update_selection(self, added, removed, selection):
+        self.coords.setEnabled(bool(selection))
+        self.location_info.setEnabled(bool(selection))
+        # markers don't move, but some may need to be (de)highlighted
+        marker_ids = set()
+        for image in added + removed:
+            if image in self.image_markers:
+                marker_ids.add(self.image_markers[image])
+        self.enable_markers(marker_ids)
+        self.display_coords()
+        self.display_location()
+        self.see_selection()
+
     def redraw_markers(self):
         if not self.map_loaded:
             return
         for info in self.marker_info.values():
             info['images'] = []
+        self.image_markers = {}
         for image in self.image_list.get_images():
             latlong = image.metadata.latlong
             if not latlong:
                 continue
-            for info in self.marker_info.values():
+            for marker_id, info in self.marker_info.items():
                 if info['latlong'] == (latlong.lat, latlong.lon):
                     info['images'].append(image)
                     break
@@ -698,12 +707,19 @@ class PhotiniMap(QtWidgets.QSplitter):
                     }
                 self.JavaScript('addMarker({:d},{!r},{!r},{:d})'.format(
                     marker_id, latlong.lat, latlong.lon, image.selected))
+            self.image_markers[image] = marker_id
         for marker_id in list(self.marker_info.keys()):
-            info = self.marker_info[marker_id]
-            if not info['images']:
+            if not self.marker_info[marker_id]['images']:
                 self.JavaScript('delMarker({:d})'.format(marker_id))
                 del self.marker_info[marker_id]
-            elif info['selected'] != any([x.selected for x in info['images']]):
+        self.enable_markers(self.marker_info.keys())
+
+    def enable_markers(self, marker_ids):
+        for marker_id in marker_ids:
+            info = self.marker_info.get(marker_id)
+            if not info:
+                continue
+            if info['selected'] != any([x.selected for x in info['images']]):
                 info['selected'] = not info['selected']
                 self.JavaScript(
                     'enableMarker({:d},{:d})'.format(marker_id, info['selected']))
@@ -19,13 +19,16 @@
 
 from __future__ import unicode_literals
 
-from collections import namedtuple
-from functools import wraps
+from collections import namedtuple, OrderedDict
+from functools import partial, wraps
 import logging
 import re
 import sys
+import threading
+import time
 
 import six
+from six.moves import queue
 
 from photini.configstore import BaseConfigStore
 
@@ -170,6 +173,125 @@ class Busy(object):
         Busy.stop()
 
 
+class WorkerPool(QtCore.QObject):
+    """Call a function on each of a list of items, using a pool of
+    worker threads so the GUI stays responsive.
+
+    Results are collected by a timer in the GUI thread and passed on
+    in batches by the batch_done signal, as a list of (item, result,
+    error) tuples. error is None unless the function raised an
+    exception. The finished signal is True if all items were
+    processed, False if the pool was cancelled.
+
+    """
+    batch_done = QtCore.pyqtSignal(list)
+    finished = QtCore.pyqtSignal(bool)
+
+    def __init__(self, func, max_threads=0, interval=100, parent=None):
+        super(WorkerPool, self).__init__(parent)
+        self.func = func
+        if max_threads <= 0:
+            max_threads = QtCore.QThread.idealThreadCount()
+        self.max_threads = max(max_threads, 1)
+        self.threads = []
+        self.pending = queue.Queue()
+        self.results = queue.Queue()
+        self.cancelled = threading.Event()
+        self.total = 0
+        self.done = 0
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.collect_results)
+
+    def start(self, items):
+        # can be called again to add items to a running pool
+        self.finish_cancelled()
+        if not self.timer.isActive():
+            self.cancelled.clear()
+            self.total = 0
+            self.done = 0
+        for item in items:
+            self.pending.put(item)
+            self.total += 1
+        self._start_threads()
+        self.timer.start()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_running(self):
+        return self.timer.isActive()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+    def finish_cancelled(self):
+        # if the pool has been cancelled but not yet finished, wait for
+        # items being processed and emit finished now, so that work
+        # added afterwards isn't mistaken for the cancelled work
+        if self.timer.isActive() and self.cancelled.is_set():
+            self.wait()
+
+    def wait(self):
+        # block until any items being processed are finished
+        for thread in self.threads:
+            thread.join()
+        self.collect_results()
+
+    def _start_threads(self):
+        self.threads = [x for x in self.threads if x.is_alive()]
+        count = min(self.max_threads, self.pending.qsize())
+        while len(self.threads) < count:
+            thread = threading.Thread(target=self._worker)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _worker(self):
+        while not self.cancelled.is_set():
+            try:
+                item = self.pending.get_nowait()
+            except queue.Empty:
+                return
+            result, error = None, None
+            try:
+                result = self.func(item)
+            except Exception as ex:
+                logger.exception(ex)
+                error = six.text_type(ex)
+            self.results.put((item, result, error))
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def collect_results(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.results.get_nowait())
+            except queue.Empty:
+                break
+        self.done += len(batch)
+        if batch:
+            self.batch_done.emit(batch)
+        if self.cancelled.is_set():
+            # discard unprocessed items
+            while True:
+                try:
+                    self.pending.get_nowait()
+                except queue.Empty:
+                    break
+        elif not self.pending.empty():
+            # a thread may have stopped just before more items were added
+            self._start_threads()
+            return
+        if any([x.is_alive() for x in self.threads]):
+            return
+        if not self.results.empty() or not self.timer.isActive():
+            return
+        self.timer.stop()
+        self.finished.emit(not self.cancelled.is_set())
+
+
 class CompactButton(QtWidgets.QPushButton):
     def __init__(self, *args, **kwds):
         super(CompactButton, self).__init__(*args, **kwds)
@@ -178,6 +300,67 @@ class CompactButton(QtWidgets.QPushButton):
         scale_font(self, 80)
 
 
+class ProgressDisplay(QtWidgets.QWidget):
+    """Show combined progress of one or more WorkerPools, with a button
+    to cancel them."""
+    def __init__(self, *arg, **kw):
+        super(ProgressDisplay, self).__init__(*arg, **kw)
+        # {pool: (text, start time, finished slot)}
+        self.pools = OrderedDict()
+        layout = QtWidgets.QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        self.bar = QtWidgets.QProgressBar()
+        layout.addWidget(self.bar)
+        self.cancel_button = CompactButton(self.tr('Cancel'))
+        self.cancel_button.clicked.connect(self.cancel)
+        layout.addWidget(self.cancel_button)
+        self.hide()
+
+    def start(self, text, pool):
+        if pool in self.pools:
+            # more items added to a running pool
+            self.pools[pool] = (text,) + self.pools[pool][1:]
+        else:
+            finished = partial(self.stop, pool)
+            pool.batch_done.connect(self.update_progress)
+            pool.finished.connect(finished)
+            self.pools[pool] = text, time.time(), finished
+        self.update_progress()
+        self.show()
+
+    def stop(self, pool, completed=False):
+        if pool not in self.pools:
+            return
+        text, start_time, finished = self.pools.pop(pool)
+        pool.batch_done.disconnect(self.update_progress)
+        pool.finished.disconnect(finished)
+        if self.pools:
+            self.update_progress()
+        else:
+            self.hide()
+
+    @QtCore.pyqtSlot()
+    @catch_all
+    def cancel(self):
+        for pool in self.pools:
+            pool.cancel()
+
+    @QtCore.pyqtSlot(list)
+    @catch_all
+    def update_progress(self, batch=None):
+        done = sum(x.done for x in self.pools)
+        total = sum(x.total for x in self.pools)
+        text = ', '.join(x[0] for x in self.pools.values()) + ' %v/%m'
+        if len(self.pools) == 1:
+            duration = time.time() - list(self.pools.values())[0][1]
+            if done and duration > 0:
+                text += ' ({:.1f}/s)'.format(float(done) / duration)
+        self.bar.setFormat(text)
+        self.bar.setMaximum(total)
+        self.bar.setValue(done)
+
+
 class SpellingHighlighter(QtGui.QSyntaxHighlighter):
     def __init__(self, *arg, **kw):
         super(SpellingHighlighter, self).__init__(*arg, **kw)
@@ -0,0 +1,143 @@
+##  Photini - a simple photo metadata editor.
+##  http://github.com/jim-easterbrook/Photini
+##  Copyright (C) 2019  Jim Easterbrook  jim@jim-easterbrook.me.uk
+##
+##  This program is free software: you can redistribute it and/or
+##  modify it under the terms of the GNU General Public License as
+##  published by the Free Software Foundation, either version 3 of the
+##  License, or (at your option) any later version.
+##
+##  This program is distributed in the hope that it will be useful,
+##  but WITHOUT ANY WARRANTY; without even the implied warranty of
+##  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+##  General Public License for more details.
+##
+##  You should have received a copy of the GNU General Public License
+##  along with this program.  If not, see
+##  <http://www.gnu.org/licenses/>.
+
+"""Summarise metadata values across several images.
+
+The editing tabs show one value if all the selected images have the
+same value of a field, otherwise they show a "multiple values" choice.
+A SelectionSummary keeps the distinct values of each field, and the
+number of images with each value, so the tabs don't need to compare
+every image's value with every other.
+
+"""
+
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+
+def hashable(value):
+    """Return a hashable equivalent of a metadata value. Dict (e.g.
+    LatLon, DateTime) and list (e.g. MultiString) values are converted
+    to tuples."""
+    if isinstance(value, dict):
+        return tuple((k, hashable(value[k])) for k in sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(hashable(x) for x in value)
+    return value
+
+
+def member_values(values, keys):
+    """Get the distinct values of each member of several dict values.
+
+    Returns a dict of lists, keyed by member name. A missing member (or
+    a value of None) counts as a member value of None.
+
+    """
+    result = dict((key, OrderedDict()) for key in keys)
+    for value in values:
+        value = value or {}
+        for key in keys:
+            member = value.get(key)
+            result[key].setdefault(hashable(member), member)
+    return dict((key, list(result[key].values())) for key in keys)
+
+
+class SelectionSummary(object):
+    """Distinct values, and the number of images with each value, of
+    metadata fields across a set of images.
+
+    A field's summary is computed the first time it's needed, then
+    kept up to date as images are added, removed or edited.
+
+    """
+    def __init__(self):
+        self.images = OrderedDict()
+        # {name: OrderedDict({key: [value, count]})}
+        self._fields = {}
+        # {name: {image: key}}
+        self._keys = {}
+
+    def __len__(self):
+        return len(self.images)
+
+    def add(self, image):
+        if image in self.images:
+            return
+        self.images[image] = None
+        for name in self._fields:
+            self._add_value(name, image)
+
+    def remove(self, image):
+        if image not in self.images:
+            return
+        del self.images[image]
+        if not self.images:
+            # nothing left to summarise
+            self._fields = {}
+            self._keys = {}
+            return
+        for name in self._fields:
+            self._remove_value(name, image)
+
+    def update(self, image, name=None):
+        """Re-read one (or every) field of an image after it's changed."""
+        if image not in self.images:
+            return
+        if name is None:
+            names = list(self._fields)
+        elif name in self._fields:
+            names = [name]
+        else:
+            return
+        for name in names:
+            self._remove_value(name, image)
+            self._add_value(name, image)
+
+    def values(self, name):
+        """Return list of the distinct values of field name."""
+        return [x[0] for x in self._summary(name).values()]
+
+    def counts(self, name):
+        """Return list of (value, number of images) tuples."""
+        return [tuple(x) for x in self._summary(name).values()]
+
+    def _summary(self, name):
+        if name not in self._fields:
+            self._fields[name] = OrderedDict()
+            self._keys[name] = {}
+            for image in self.images:
+                self._add_value(name, image)
+        return self._fields[name]
+
+    def _add_value(self, name, image):
+        value = getattr(image.metadata, name)
+        key = hashable(value)
+        self._keys[name][image] = key
+        summary = self._fields[name]
+        if key in summary:
+            summary[key][1] += 1
+        else:
+            summary[key] = [value, 1]
+
+    def _remove_value(self, name, image):
+        key = self._keys[name].pop(image)
+        summary = self._fields[name]
+        summary[key][1] -= 1
+        if summary[key][1] <= 0:
+            del summary[key]
@@ -19,7 +19,6 @@
 
 from __future__ import unicode_literals
 
-from collections import defaultdict
 from datetime import datetime, timedelta
 import logging
 import math
@@ -31,6 +30,7 @@ from photini.metadata import LensSpec
 from photini.pyqt import (
     catch_all, ComboBox, multiple, multiple_values, Qt, QtCore, QtGui,
     QtWidgets, scale_font, set_symbol_font, Slider, SquareButton)
+from photini.summary import member_values
 
 logger = logging.getLogger(__name__)
 
@@ -840,19 +840,13 @@ class Technical(QtWidgets.QWidget):
             master = slave
 
     def _update_datetime(self):
-        images = self.image_list.get_selected_images()
+        summary = self.image_list.summary
+        if not summary:
+            return
         for name in self.date_widget:
-            attribute = 'date_' + name
             widget = self.date_widget[name]
-            values = defaultdict(list)
-            for image in images:
-                image_datetime = getattr(image.metadata, attribute) or {}
-                for key in widget.members:
-                    value = None
-                    if key in image_datetime:
-                        value = image_datetime[key]
-                    if value not in values[key]:
-                        values[key].append(value)
+            values = member_values(
+                summary.values('date_' + name), list(widget.members))
             for key in widget.members:
                 if len(values[key]) > 1:
                     widget.members[key].set_multiple(choices=values[key])
@@ -860,9 +854,19 @@ class Technical(QtWidgets.QWidget):
                     widget.members[key].set_value(values[key][0])
 
     def _update_links(self):
-        images = self.image_list.get_selected_images()
+        summary = self.image_list.summary
         for master, slave in self.link_widget:
-            for image in images:
+            master_values = summary.values('date_' + master)
+            slave_values = summary.values('date_' + slave)
+            if len(master_values) == 1 and len(slave_values) == 1:
+                # no need to compare each image
+                self.link_widget[master, slave].setChecked(
+                    master_values[0] == slave_values[0])
+                continue
+            if len(master_values) != len(slave_values):
+                self.link_widget[master, slave].setChecked(False)
+                continue
+            for image in self.image_list.get_selected_images():
                 if (getattr(image.metadata, 'date_' + master) !=
                         getattr(image.metadata, 'date_' + slave)):
                     self.link_widget[master, slave].setChecked(False)
@@ -870,29 +874,34 @@ class Technical(QtWidgets.QWidget):
             else:
                 self.link_widget[master, slave].setChecked(True)
 
+    def _single_value(self, name):
+        # return (True, value) if all selected images have the same
+        # value of field name
+        values = self.image_list.summary.values(name)
+        if len(values) == 1:
+            return True, values[0]
+        return False, None
+
     def _update_orientation(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
+            return
+        single, value = self._single_value('orientation')
+        if not single:
+            # multiple values
+            self.widgets['orientation'].set_multiple()
             return
-        value = images[0].metadata.orientation
-        for image in images[1:]:
-            if image.metadata.orientation != value:
-                # multiple values
-                self.widgets['orientation'].set_multiple()
-                return
         self.widgets['orientation'].set_value(value)
 
     def _update_lens_model(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
             return
-        model = images[0].metadata.lens_model
-        for image in images[1:]:
-            if image.metadata.lens_model != model:
-                # multiple values
-                self.widgets['lens_model'].set_multiple()
-                self.widgets['lens_model'].setToolTip('')
-                return
+        single, model = self._single_value('lens_model')
+        if not single:
+            # multiple values
+            self.widgets['lens_model'].set_multiple()
+            self.widgets['lens_model'].setToolTip('')
+            return
+        images = self.image_list.get_selected_images()
         if not self.widgets['lens_model'].known_value(model):
             # new lens
             self.lens_data.load_from_image(model, images[0])
@@ -908,20 +917,18 @@ class Technical(QtWidgets.QWidget):
         self.widgets['lens_model'].setToolTip(tool_tip)
 
     def _update_lens_spec(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
+            return
+        single, spec = self._single_value('lens_spec')
+        if not single:
+            # multiple values
+            self.widgets['lens_spec'].set_multiple()
             return
-        spec = images[0].metadata.lens_spec
-        for image in images[1:]:
-            if image.metadata.lens_spec != spec:
-                # multiple values
-                self.widgets['lens_spec'].set_multiple()
-                return
         self.widgets['lens_spec'].set_value(spec)
         if not spec:
             return
         make_changes = False
-        for image in images:
+        for image in self.image_list.get_selected_images():
             if image.metadata.aperture:
                 new_aperture = image.metadata.aperture
             else:
@@ -966,41 +973,36 @@ class Technical(QtWidgets.QWidget):
             self._update_focal_length_35()
 
     def _update_aperture(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
+            return
+        single, value = self._single_value('aperture')
+        if not single:
+            self.widgets['aperture'].set_multiple()
             return
-        value = images[0].metadata.aperture
-        for image in images[1:]:
-            if image.metadata.aperture != value:
-                self.widgets['aperture'].set_multiple()
-                return
         self.widgets['aperture'].set_value(value)
 
     def _update_focal_length(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
+            return
+        single, value = self._single_value('focal_length')
+        if not single:
+            self.widgets['focal_length'].set_multiple()
             return
-        value = images[0].metadata.focal_length
-        for image in images[1:]:
-            if image.metadata.focal_length != value:
-                self.widgets['focal_length'].set_multiple()
-                return
         self.widgets['focal_length'].set_value(value)
 
     def _update_focal_length_35(self):
-        images = self.image_list.get_selected_images()
-        if not images:
+        if not self.image_list.summary:
             return
         # display real value if it exists
-        value = images[0].metadata.focal_length_35
-        for image in images[1:]:
-            if image.metadata.focal_length_35 != value:
-                self.widgets['focal_length_35'].set_multiple()
-                return
+        single, value = self._single_value('focal_length_35')
+        if not single:
+            self.widgets['focal_length_35'].set_multiple()
+            return
         self.widgets['focal_length_35'].set_value(value)
         if value:
             return
         # otherwise display calculated value
+        images = self.image_list.get_selected_images()
         value = self.calc_35(images[0].metadata)
         for image in images[1:]:
             fl_35 = self.calc_35(image.metadata)
@@ -1079,3 +1081,6 @@ class Technical(QtWidgets.QWidget):
         self._update_focal_length_35()
         self._update_lens_spec()
         self.setEnabled(True)
+
+    def update_selection(self, added, removed, selection):
+        self.new_selection(selection)
@@ -19,7 +19,6 @@
 
 from __future__ import unicode_literals
 
-import imghdr
 import logging
 import os
 import six
@@ -30,6 +29,7 @@ import webbrowser
 import appdirs
 import keyring
 
+from photini.imageheader import probe_file
 from photini.metadata import Metadata
 from photini.pyqt import (
     Busy, catch_all, Qt, QtCore, QtGui, QtWidgets, StartStopButton)
@@ -109,7 +109,7 @@ class UploadWorker(QtCore.QObject):
         with open(path, 'rb') as f:
             self.fileobj = FileObjWithCallback(f, self.upload_progress.emit)
             error = self.session.do_upload(
-                self.fileobj, imghdr.what(path), image, params)
+                self.fileobj, probe_file(path)[0], image, params)
         if convert:
             os.unlink(path)
         if self.fileobj:
@@ -452,3 +452,6 @@ then enter the verification code:""").format(info_text))
         self.upload_button.setEnabled(
             self.upload_button.isChecked() or (
                 len(selection) > 0 and self.connected))
+
+    def update_selection(self, added, removed, selection):
+        self.new_selection(selection)